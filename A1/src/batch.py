@@ -0,0 +1,117 @@
+from problem import Problem
+from packedProblem import PackedProblem
+from search import caseJobs, runAlgorithm
+from portfolio import caseFiles
+import json, os, sys
+
+"""
+    Batch runner for the MNKY problem. Reads many problems in a single
+    process and solves each one in turn with the searches search.py runs,
+    printing the report of every search as soon as it is done. Problems are
+    read one at a time, only when the previous one is solved, so a batch of
+    any size is never held in memory, and the interpreter and the modules
+    are loaded once for the whole batch.
+
+    Problems can come from:
+        - files of one or more problems in the search.py input format, one
+          after the other (blank lines between them are skipped);
+        - folders of such files;
+        - JSONL files (ending in .jsonl), one problem per line as an object
+          with the keys m, n, k, y and packages, a list of [source,
+          destination] coordinate lists, and optionally a name;
+        - standard input, as "-" or when no file is given.
+
+    Usage: python3 batch.py [options] [files, folders or -]
+        --run-bfs, --run-iddfs, --run-idastar, --run-bidirectional,
+        --packed, --print-plan
+                        as in search.py.
+
+    Authors: Mahmud Ahzam*, Tayab Soomro*, Flaviu Vadan*
+    Class: CMPT317
+    Instructor: Michael Horsch
+    Assignment: 1
+
+    * - all authors equally contributed to the implementation
+"""
+
+def streamProblems(f, name, packed=False):
+    """
+        Read the problems of an open file one at a time.
+        :param f: open file of problems, or a list of lines.
+        :param name: name of the file, problems after the first one are
+                        named name#2, name#3 and so on.
+        :param packed: whether to build PackedProblems.
+        :return: generator of (name, problem) pairs.
+    """
+    cls = PackedProblem if packed else Problem
+    if name.endswith(".jsonl"):
+        for number, line in enumerate(f, 1):
+            if line.strip() == "":
+                continue
+            record = json.loads(line)
+            yield record.get("name", name + ":" + str(number)),\
+                    cls.fromRecord(record)
+        return
+    for number, problem in enumerate(cls.readProblems(f, name), 1):
+        yield name if number == 1 else name + "#" + str(number), problem
+
+def readBatch(paths, packed=False):
+    """
+        Read the problems of test case files and folders one at a time.
+        :param paths: files, folders or "-" for standard input.
+        :param packed: whether to build PackedProblems.
+        :return: generator of (name, problem) pairs.
+    """
+    for path in caseFiles(paths):
+        if path == "-":
+            yield from streamProblems(sys.stdin, "stdin", packed)
+            continue
+        with open(path) as f:
+            yield from streamProblems(f, os.path.basename(path), packed)
+
+def runBatch(problems, jobs, printPlan=False, output=None):
+    """
+        Run every search job on every problem, in this process.
+        :param problems: iterable of (name, problem) pairs.
+        :param jobs: (algorithm, heuristic index) pairs, see caseJobs.
+        :param printPlan: whether to add the plans to the reports.
+        :param output: called with the name of the problem and the report
+                        lines of each job as soon as the job is done.
+        :return: number of problems solved.
+    """
+    count = 0
+    for name, problem in problems:
+        for algorithm, i in jobs:
+            lines = runAlgorithm(problem, algorithm, i, printPlan)
+            if output is not None:
+                output(name, lines)
+        count += 1
+    return count
+
+if __name__ == '__main__':
+
+    runBFS = "--run-bfs" in sys.argv
+    runIDDFS = "--run-iddfs" in sys.argv
+    runIDAStar = "--run-idastar" in sys.argv
+    runBidirectional = "--run-bidirectional" in sys.argv
+    packed = "--packed" in sys.argv
+    printPlan = "--print-plan" in sys.argv
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(paths) == 0:
+        paths.append("-")
+
+    jobs = caseJobs(runBFS, runIDDFS, runIDAStar,
+                    runBidirectional=runBidirectional)
+    current = [None]
+
+    def output(name, lines):
+        if name != current[0]:
+            if current[0] is not None:
+                print("\nFinished " + current[0] + "\n", file=sys.stderr)
+            current[0] = name
+            print("\n\n________________________________________________________\n" + name + "\n")
+        print("\n".join(lines), flush=True)
+
+    runBatch(readBatch(paths, packed), jobs, printPlan, output)
+    if current[0] is not None:
+        print("\nFinished " + current[0] + "\n", file=sys.stderr)
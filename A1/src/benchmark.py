@@ -0,0 +1,341 @@
+from search import HEURISTICS, HEURISTIC_SEARCHES, reportLabel, runSearch
+from portfolio import TEST_DIR, caseFiles, problemFromText, runJobs
+from timing import Timer
+from collections import deque
+import csv, json, os, resource, sys, tracemalloc
+
+"""
+    Benchmark harness for the MNKY problem. Runs every test case through
+    each search algorithm and heuristic, one job per worker process, and
+    records the expanded nodes, generated nodes, peak frontier size, peak
+    resident memory, wall time and CPU time (see timing.py) of each run
+    separately. Results are written as JSON and/or CSV and can be compared
+    against a stored JSON baseline to flag regressions.
+
+    Usage: python3 benchmark.py [options] [test case files or folders]
+        --algorithms A,B  searches to run (default: bfs,dfs,iddfs,astar,
+                          idastar);
+        --packed          searches on packed tuple states;
+        --timeout S       seconds before a run is killed (default: 60);
+        --memory MB       address space cap of each run (default: none);
+        --json FILE       write the results as JSON;
+        --csv FILE        write the results as CSV;
+        --baseline FILE   compare with the results in a JSON file and exit
+                          with status 1 if any run regressed;
+        --tolerance T     allowed relative increase of the wall time, CPU
+                          time and peak memory over the baseline
+                          (default: 0.25).
+        --node-bytes      instead, report the bytes per frontier node of A*
+                          with every heuristic, see frontierBytes.
+        --allocations N   instead, report the memory kept per successor
+                          over the first N expansions, see allocations.
+
+    Authors: Mahmud Ahzam*, Tayab Soomro*, Flaviu Vadan*
+    Class: CMPT317
+    Instructor: Michael Horsch
+    Assignment: 1
+
+    * - all authors equally contributed to the implementation
+"""
+
+ALGORITHMS = ["bfs", "dfs", "iddfs", "astar", "idastar"]
+
+FIELDS = ["case", "encoding", "search", "status", "expanded", "generated",
+            "peak_frontier", "depth", "cost", "wall_ms", "cpu_ms",
+            "peak_rss_kb"]
+
+# Counts that are deterministic, any increase is a regression:
+COUNTS = ["expanded", "generated", "peak_frontier"]
+
+# Measurements that vary between runs, compared with a tolerance:
+MEASURED = ["wall_ms", "cpu_ms", "peak_rss_kb"]
+
+# Wall and CPU time differences below this many milliseconds are noise:
+MIN_WALL_MS = 5
+
+def benchmarkJobs(algorithms=ALGORITHMS):
+    """
+        List the (algorithm, heuristic index) pairs to run on every case.
+        :param algorithms: names of the searches to run.
+    """
+    jobs = []
+    for algorithm in algorithms:
+        if algorithm in HEURISTIC_SEARCHES:
+            for i in range(1, len(HEURISTICS) + 1):
+                jobs.append((algorithm, i))
+        else:
+            jobs.append((algorithm, None))
+    return jobs
+
+def measure(text, packed, algorithm, i):
+    """
+        Run one search on a test case and measure it. Meant to run in its
+        own worker process so that the peak memory is the search's.
+        :param text: contents of the test case file.
+        :param packed: whether to search on packed tuple states.
+        :param algorithm: "bfs", "dfs", "iddfs" or one of the
+                          HEURISTIC_SEARCHES.
+        :param i: 1-based index into HEURISTICS for HEURISTIC_SEARCHES.
+        :return: dictionary of the FIELDS that depend on the run.
+    """
+    problem = problemFromText(text, packed)
+    generated = [0]
+    materialize = problem.materialize
+    def counting(*args):
+        generated[0] += 1
+        return materialize(*args)
+    # every search node but the root is built by materialize:
+    problem.materialize = counting
+
+    timer = Timer()
+    result = runSearch(problem, algorithm, i)
+    wall, cpu = timer.wallMs(), timer.cpuMs()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    record = {"status": "solved", "expanded": None, "depth": None,
+                "peak_frontier": None, "cost": None}
+    if len(result) == 0 or result[5] == -1:
+        record["status"] = "no solution"
+    else:
+        record["expanded"] = result[1]
+        record["depth"] = result[2]
+        record["peak_frontier"] = result[4]
+        record["cost"] = result[5]
+    record["generated"] = generated[0]
+    record["wall_ms"] = wall
+    record["cpu_ms"] = cpu
+    record["peak_rss_kb"] = rss
+    return record
+
+def frontierBytes(text, packed=False, i=1):
+    """
+        Trace the memory allocated by an A* run and spread its peak over
+        the peak number of queued nodes. Nodes stay alive through their
+        successors' parent pointers, so this is what a frontier node costs.
+        :param text: contents of the test case file.
+        :param packed: whether to search on packed tuple states.
+        :param i: 1-based index into HEURISTICS.
+        :return: (bytes per frontier node, peak frontier, peak bytes); the
+                 bytes per node are None when no node was queued, e.g. when
+                 the initial state is the goal.
+    """
+    problem = problemFromText(text, packed)
+    tracemalloc.start()
+    try:
+        result = runSearch(problem, "astar", i)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    if result[4] <= 0:
+        # nothing was queued, or the search failed (-1):
+        return None, max(result[4], 0), peak
+    return peak // result[4], result[4], peak
+
+def allocations(text, packed=False, expansions=1000):
+    """
+        Expand the first nodes of a breadth first tree search and trace the
+        memory its successors keep, i.e. the allocations a state costs
+        beyond what it shares with its parent.
+        :param text: contents of the test case file.
+        :param packed: whether to search on packed tuple states.
+        :param expansions: number of nodes to expand.
+        :return: (successors, bytes per successor, memory blocks per
+                 successor); the last two are None when there are no
+                 successors.
+    """
+    problem = problemFromText(text, packed)
+    frontier = deque([problem.getInitState()])
+    kept = []
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        while expansions > 0 and len(frontier) > 0:
+            successors = problem.successors(frontier.popleft())
+            kept += successors
+            frontier += successors
+            expansions -= 1
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    if len(kept) == 0:
+        return 0, None, None
+    return len(kept), size // len(kept), round(blocks / len(kept), 2)
+
+def runBenchmark(files, algorithms=ALGORITHMS, packed=False, timeout=60,
+                    memory=None, output=None):
+    """
+        Measure every search on every test case, one run at a time.
+        :param files: test case files.
+        :param algorithms: names of the searches to run.
+        :param packed: whether to search on packed tuple states.
+        :param timeout: seconds before a run is killed, None for no limit.
+        :param memory: address space cap in bytes of each run.
+        :param output: called with each record as soon as it is done.
+        :return: list of records, dictionaries with the FIELDS as keys.
+    """
+    perCase = benchmarkJobs(algorithms)
+    jobs = []
+    records = []
+    for f in files:
+        with open(f) as case:
+            text = case.read()
+        for algorithm, i in perCase:
+            jobs.append((text, packed, algorithm, i))
+            records.append({"case": os.path.splitext(os.path.basename(f))[0],
+                            "encoding": "packed" if packed else "object",
+                            "search": reportLabel(algorithm, i)})
+
+    def done(index, result):
+        failure, value = result
+        if failure is None:
+            records[index].update(value)
+        else:
+            records[index]["status"] = failure
+        records[index] = {field: records[index].get(field)
+                            for field in FIELDS}
+        if output is not None:
+            output(records[index])
+
+    # one worker, so that runs do not compete for the cpu:
+    runJobs(measure, jobs, 1, timeout, memory, done)
+    return records
+
+def writeJSON(records, path):
+    """ Write benchmark records to a JSON file """
+    with open(path, "w") as f:
+        json.dump(records, f, indent=1)
+
+def writeCSV(records, path):
+    """ Write benchmark records to a CSV file """
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+
+def compare(records, baseline, tolerance=0.25):
+    """
+        Compare benchmark records with baseline records of the same runs.
+        :param records: new records.
+        :param baseline: records to compare with, runs are matched on
+                            case, encoding and search.
+        :param tolerance: allowed relative increase of the MEASURED fields.
+        :return: list of messages, one per regression.
+    """
+    key = lambda r: (r["case"], r["encoding"], r["search"])
+    old = {key(r): r for r in baseline}
+    regressions = []
+    for record in records:
+        if key(record) not in old:
+            continue
+        before = old[key(record)]
+        name = " ".join(key(record))
+        if before["status"] == "solved" and record["status"] != "solved":
+            regressions.append(name + ": " + record["status"])
+            continue
+        if record["status"] != "solved" or before["status"] != "solved":
+            continue
+        if abs(record["cost"] - before["cost"]) > 1e-6:
+            regressions.append(name + ": cost " + str(before["cost"]) +\
+                                " -> " + str(record["cost"]))
+        for field in COUNTS:
+            if before[field] is not None and record[field] > before[field]:
+                regressions.append(name + ": " + field + " " +\
+                    str(before[field]) + " -> " + str(record[field]))
+        for field in MEASURED:
+            if before.get(field) is None:
+                # baselines from before the field was recorded:
+                continue
+            limit = before[field] * (1 + tolerance)
+            if field in ["wall_ms", "cpu_ms"]:
+                limit = max(limit, before[field] + MIN_WALL_MS)
+            if record[field] > limit:
+                regressions.append(name + ": " + field + " " +\
+                    str(before[field]) + " -> " + str(record[field]))
+    return regressions
+
+if __name__ == '__main__':
+
+    algorithms = ALGORITHMS
+    packed = False
+    timeout = 60
+    memory = None
+    jsonPath = None
+    csvPath = None
+    baselinePath = None
+    tolerance = 0.25
+    nodeBytes = False
+    expansions = None
+    paths = []
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg == "--algorithms":
+            algorithms = next(args).split(",")
+        elif arg == "--packed":
+            packed = True
+        elif arg == "--timeout":
+            timeout = float(next(args))
+        elif arg == "--memory":
+            memory = int(float(next(args)) * 1024 * 1024)
+        elif arg == "--json":
+            jsonPath = next(args)
+        elif arg == "--csv":
+            csvPath = next(args)
+        elif arg == "--baseline":
+            baselinePath = next(args)
+        elif arg == "--tolerance":
+            tolerance = float(next(args))
+        elif arg == "--node-bytes":
+            nodeBytes = True
+        elif arg == "--allocations":
+            expansions = int(next(args))
+        else:
+            paths.append(arg)
+    if len(paths) == 0:
+        paths.append(TEST_DIR)
+
+    if nodeBytes:
+        print("case\tencoding\tsearch\tbytes_per_node\tpeak_frontier" +\
+                "\tpeak_bytes")
+        for f in caseFiles(paths):
+            with open(f) as case:
+                text = case.read()
+            for i in range(1, len(HEURISTICS) + 1):
+                perNode, frontier, peak = frontierBytes(text, packed, i)
+                print("\t".join([os.path.splitext(os.path.basename(f))[0],
+                    "packed" if packed else "object", reportLabel("astar", i),
+                    str(perNode), str(frontier), str(peak)]), flush=True)
+        sys.exit(0)
+
+    if expansions is not None:
+        print("case\tencoding\tsuccessors\tbytes_per_successor" +\
+                "\tblocks_per_successor")
+        for f in caseFiles(paths):
+            with open(f) as case:
+                text = case.read()
+            count, size, blocks = allocations(text, packed, expansions)
+            print("\t".join([os.path.splitext(os.path.basename(f))[0],
+                "packed" if packed else "object", str(count), str(size),
+                str(blocks)]), flush=True)
+        sys.exit(0)
+
+    def output(record):
+        print("\t".join(str(record[field]) for field in FIELDS), flush=True)
+
+    print("\t".join(FIELDS))
+    records = runBenchmark(caseFiles(paths), algorithms, packed, timeout,
+                            memory, output)
+    if jsonPath is not None:
+        writeJSON(records, jsonPath)
+    if csvPath is not None:
+        writeCSV(records, csvPath)
+    if baselinePath is not None:
+        with open(baselinePath) as f:
+            regressions = compare(records, json.load(f), tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if len(regressions) > 0:
+            sys.exit(1)
@@ -1,9 +1,12 @@
 import math
 
+# Weight of the longest vehicle distance in the cost, see SearchNode:
+DISTANCE_TO_TIME = 10
+
 """
     Implementation file of all metrics used for the MNKY problem. The file
     defines and implements euclidean and manhattan distance methods, a method
-    for computing the value difference between two states, and the five
+    for computing the value difference between two states, and the seven
     heuristics used in the MNKY problem.
 
     Authors: Mahmud Ahzam, Tayab Soomro, Flaviu Vadan
@@ -109,6 +112,406 @@ def h5(state):
             farthest_d = euclidean_metric(origin, p.destination) > farthest_d
     return farthest_s + farthest_d
 
+def h6(state):
+    """
+        Heuristic:
+        Manhattan minimum spanning tree over the points still to be visited:
+        the origin, vehicles away from it, sources of waiting packages and
+        destinations of undelivered ones. The vehicles' remaining routes all
+        end at the origin, so together they connect every such point and
+        drive at least the tree's length: h6 never overestimates.
+        :param state: a state will vehicles and packages at certain
+                      positions.
+    """
+    origin = tuple([0 for x in range(len(state.getVehicles()[0].getPosition()))])
+    points = set([origin])
+    for k1, v in state.getVehicles().items():
+        points.add(v.getPosition())
+    for k2, p in state.getPackages().items():
+        if p.carrier() is None:
+            points.add(p.getPosition())
+        points.add(p.getDestination())
+    return minimumSpanningTree(list(points), metric)
+
+def h7(state):
+    """
+        Heuristic:
+        h6 strengthened with a bound on the time term. Each vehicle must
+        still drive to its carried packages' destinations and back to the
+        origin, and each waiting package needs some vehicle to fetch it,
+        deliver it and return. The larger of the tree and the sum of the
+        vehicles' own trips bounds the distance left; the time term grows by
+        at least the trip of the vehicle that has driven the most so far,
+        which a bare state does not tell, so the smallest trip is used.
+        Searches use IncrementalH7, which knows the distances driven.
+        :param state: a state will vehicles and packages at certain
+                      positions.
+    """
+    origin = tuple([0 for x in range(len(state.getVehicles()[0].getPosition()))])
+    trips = []
+    for k1, v in state.getVehicles().items():
+        trip = metric(v.getPosition(), origin)
+        for k2, p in state.getPackages().items():
+            if p.carrier() == v.getIndex():
+                trip = max(trip, metric(v.getPosition(), p.getDestination()) +
+                                    metric(p.getDestination(), origin))
+        trips.append(trip)
+    return max(h6(state), sum(trips)) + DISTANCE_TO_TIME * min(trips)
+
+def minimumSpanningTree(nodes, distance):
+    """
+        Prim's algorithm on the complete graph over the given nodes.
+        :param nodes: list of nodes.
+        :param distance: function giving the length of the edge between
+                            two nodes.
+        :return: total length of a minimum spanning tree.
+    """
+    if len(nodes) < 2:
+        return 0
+    total = 0
+    closest = [distance(nodes[0], other) for other in nodes[1:]]
+    rest = nodes[1:]
+    while len(rest) > 0:
+        i = min(range(len(rest)), key=closest.__getitem__)
+        total += closest[i]
+        added = rest[i]
+        rest = rest[:i] + rest[i + 1:]
+        closest = closest[:i] + closest[i + 1:]
+        for k in range(len(rest)):
+            d = distance(added, rest[k])
+            if d < closest[k]:
+                closest[k] = d
+    return total
+
+class IncrementalHeuristic():
+    """
+        A heuristic that can be updated along a successor edge from the
+        value of the parent, instead of scanning every vehicle and package
+        again. Besides the value, each state may keep some auxiliary data
+        that the update needs. The states are read through the problem so
+        that the same heuristic works on every state encoding, and distances
+        are looked up in the problem's table by point index.
+    """
+    problem = None
+    euclidean = None
+    stateOnly = True # whether the value only depends on the state.
+
+    def __init__(self, _problem):
+        """
+            Bind the heuristic to a problem.
+            :param _problem: the problem whose states are evaluated.
+        """
+        self.problem = _problem
+        self.euclidean = _problem.euclidean
+
+    def evaluate(self, state):
+        """
+            Compute the heuristic from scratch.
+            :return: value and auxiliary data.
+        """
+        return 0, None
+
+    def update(self, value, aux, parentState, state, move):
+        """
+            Compute the heuristic of a successor.
+            :param value: heuristic value of the parent.
+            :param aux: auxiliary data of the parent.
+            :param parentState: the parent state.
+            :param state: the successor state.
+            :param move: (vehicle, package) changed by the move, package
+                         is None when the vehicle returns to the origin.
+            :return: value and auxiliary data.
+        """
+        return value, aux
+
+    def evaluateNode(self, node):
+        """
+            Compute the heuristic of a search node from scratch. Only the
+            state matters unless a subclass also uses the distances the
+            vehicles have driven.
+            :return: value and auxiliary data.
+        """
+        return self.evaluate(node.getState())
+
+    def updateNode(self, node):
+        """
+            Compute the heuristic of a search node from its predecessor's.
+            :return: value and auxiliary data.
+        """
+        pred = node.pred
+        return self.update(pred.getHeuristic(), pred.hAux, pred.getState(),
+                            node.getState(), node.move)
+
+class IncrementalH2(IncrementalHeuristic):
+    """
+        Incremental h2. Only deliveries change the value: the delivery
+        distance drops by the delivered package's and the max return
+        distance is only searched again if that package had it.
+    """
+    delivery = None
+    ret = None
+
+    def __init__(self, _problem):
+        IncrementalHeuristic.__init__(self, _problem)
+        self.delivery = [self.euclidean[_problem.source(j)]\
+                            [_problem.destination(j)]
+                            for j in range(_problem.n)]
+        self.ret = [self.euclidean[_problem.destination(j)][0]
+                        for j in range(_problem.n)]
+
+    def maxReturn(self, state):
+        max_distance = 0
+        for j in range(self.problem.n):
+            if not self.problem.isDelivered(state, j) and\
+                    max_distance < self.ret[j]:
+                max_distance = self.ret[j]
+        return max_distance
+
+    def evaluate(self, state):
+        delivery_distance = 0
+        for j in range(self.problem.n):
+            if not self.problem.isDelivered(state, j):
+                delivery_distance += self.delivery[j]
+        max_distance = self.maxReturn(state)
+        return max_distance + delivery_distance,\
+                (max_distance, delivery_distance)
+
+    def update(self, value, aux, parentState, state, move):
+        v, j = move
+        if j is None or not self.problem.isDelivered(state, j):
+            return value, aux
+        max_distance, delivery_distance = aux
+        delivery_distance -= self.delivery[j]
+        if self.ret[j] >= max_distance:
+            max_distance = self.maxReturn(state)
+        return max_distance + delivery_distance,\
+                (max_distance, delivery_distance)
+
+class IncrementalH3(IncrementalHeuristic):
+    """
+        Incremental h3. The auxiliary data is the term of each vehicle: the
+        moving vehicle's term is computed again, and a pick up removes the
+        package from the terms of the other vehicles.
+    """
+    toMid = None
+
+    def __init__(self, _problem):
+        IncrementalHeuristic.__init__(self, _problem)
+        mids = []
+        for j in range(_problem.n):
+            src = _problem.points[_problem.source(j)]
+            dest = _problem.points[_problem.destination(j)]
+            mids.append([abs(src[i]-dest[i])/2 for i in range(len(src))])
+        # distance from every point to every package's mid-point:
+        self.toMid = [[euclidean_metric(pt, mid) for mid in mids]
+                        for pt in _problem.points]
+
+    def term(self, state, v):
+        at = self.problem.vehicleLocation(state, v)
+        distance = 0
+        for j in range(self.problem.n):
+            if self.problem.isDelivered(state, j):
+                continue
+            carrier = self.problem.carrier(state, j)
+            # Package is carried by some other vehicle:
+            if carrier is not None and carrier != v:
+                continue
+            distance += self.toMid[at][j]
+        return distance + self.euclidean[at][0]
+
+    def evaluate(self, state):
+        terms = [self.term(state, v) for v in range(self.problem.m)]
+        return sum(terms), terms
+
+    def update(self, value, aux, parentState, state, move):
+        v, j = move
+        terms = list(aux)
+        terms[v] = self.term(state, v)
+        if j is not None and self.problem.carrier(parentState, j) is None\
+                and not self.problem.isDelivered(parentState, j):
+            # picked up, no other vehicle can go for it any more
+            for u in range(self.problem.m):
+                if u != v:
+                    at = self.problem.vehicleLocation(state, u)
+                    terms[u] -= self.toMid[at][j]
+        return sum(terms), terms
+
+class IncrementalH4(IncrementalHeuristic):
+    """
+        Incremental h4. The closest mid-point search in h4 starts from the
+        vehicle's own position, at distance 0, so it never replaces it and
+        h4 is the sum of the return distances: a move only changes the
+        moving vehicle's.
+    """
+    def evaluate(self, state):
+        distance = 0
+        for v in range(self.problem.m):
+            at = self.problem.vehicleLocation(state, v)
+            distance += self.euclidean[at][0]
+        return distance, None
+
+    def update(self, value, aux, parentState, state, move):
+        v, j = move
+        old = self.problem.vehicleLocation(parentState, v)
+        new = self.problem.vehicleLocation(state, v)
+        return value - self.euclidean[old][0] + self.euclidean[new][0], None
+
+class IncrementalH5(IncrementalHeuristic):
+    """
+        Incremental h5. h5 ends up as one for any package left away from the
+        origin plus one for any destination left away from it, so the
+        auxiliary data counts those packages and deliveries decrement them.
+    """
+    awaySource = None
+    awayDestination = None
+
+    def __init__(self, _problem):
+        IncrementalHeuristic.__init__(self, _problem)
+        self.awaySource = [self.euclidean[0][_problem.source(j)] > 0
+                            for j in range(_problem.n)]
+        self.awayDestination = [self.euclidean[0][_problem.destination(j)] > 0
+                                for j in range(_problem.n)]
+
+    def evaluate(self, state):
+        sources = 0
+        destinations = 0
+        for j in range(self.problem.n):
+            if not self.problem.isDelivered(state, j):
+                sources += self.awaySource[j]
+                destinations += self.awayDestination[j]
+        return (sources > 0) + (destinations > 0), (sources, destinations)
+
+    def update(self, value, aux, parentState, state, move):
+        v, j = move
+        if j is None or not self.problem.isDelivered(state, j):
+            return value, aux
+        sources = aux[0] - self.awaySource[j]
+        destinations = aux[1] - self.awayDestination[j]
+        return (sources > 0) + (destinations > 0), (sources, destinations)
+
+class IncrementalH6(IncrementalHeuristic):
+    """
+        h6 over the problem's table of Manhattan distances. The points to
+        visit are kept as a bit mask of point indices, and the tree length
+        of every mask is cached, since many states share their points and
+        only differ by who is carrying what.
+    """
+    manhattan = None
+    sourceBit = None
+    destinationBit = None
+    cache = None
+
+    def __init__(self, _problem):
+        IncrementalHeuristic.__init__(self, _problem)
+        self.manhattan = _problem.manhattan
+        self.sourceBit = [1 << _problem.source(j) for j in range(_problem.n)]
+        self.destinationBit = [1 << _problem.destination(j)
+                                for j in range(_problem.n)]
+        self.cache = {}
+
+    def terminals(self, state):
+        """ Bit mask of the point indices still to be visited """
+        mask = 1
+        for v in range(self.problem.m):
+            mask |= 1 << self.problem.vehicleLocation(state, v)
+        for j in range(self.problem.n):
+            if self.problem.isDelivered(state, j):
+                continue
+            if self.problem.carrier(state, j) is None:
+                mask |= self.sourceBit[j]
+            mask |= self.destinationBit[j]
+        return mask
+
+    def evaluate(self, state):
+        mask = self.terminals(state)
+        if mask not in self.cache:
+            nodes = [i for i in range(mask.bit_length()) if mask >> i & 1]
+            self.cache[mask] = minimumSpanningTree(nodes,
+                                    lambda a, b: self.manhattan[a][b])
+        return self.cache[mask], None
+
+    def update(self, value, aux, parentState, state, move):
+        return self.evaluate(state)
+
+class IncrementalH7(IncrementalH6):
+    """
+        h7 over the problem's distance tables. On a search node the time
+        term uses the distances driven so far: the longest any vehicle will
+        have driven is at least each vehicle's distance plus its own trip,
+        and for each waiting package the cheapest vehicle's distance plus
+        the trip through the package, while the cost already counts the
+        current longest distance.
+    """
+    fetch = None
+    finish = None
+    stateOnly = False
+
+    def __init__(self, _problem):
+        IncrementalH6.__init__(self, _problem)
+        man = self.manhattan
+        n = _problem.n
+        # from every point: deliver package j then return to the origin
+        self.finish = [[man[at][_problem.destination(j)] +\
+                            man[_problem.destination(j)][0]
+                        for j in range(n)] for at in range(len(man))]
+        # from every point: pick up package j, deliver it and return
+        self.fetch = [[man[at][_problem.source(j)] +\
+                            self.finish[_problem.source(j)][j]
+                        for j in range(n)] for at in range(len(man))]
+
+    def trips(self, state):
+        """ Lower bound of the distance each vehicle still has to drive """
+        problem = self.problem
+        locations = [problem.vehicleLocation(state, v)
+                        for v in range(problem.m)]
+        trips = [self.manhattan[at][0] for at in locations]
+        for j in range(problem.n):
+            if problem.isDelivered(state, j):
+                continue
+            carrier = problem.carrier(state, j)
+            if carrier is not None:
+                trip = self.finish[locations[carrier]][j]
+                if trip > trips[carrier]:
+                    trips[carrier] = trip
+        return locations, trips
+
+    def bound(self, state, driven):
+        """
+            Heuristic value given the distance each vehicle has driven.
+        """
+        problem = self.problem
+        locations, trips = self.trips(state)
+        distance = max(IncrementalH6.evaluate(self, state)[0], sum(trips))
+        longest = max(driven[v] + trips[v] for v in range(problem.m))
+        for j in range(problem.n):
+            if problem.isDelivered(state, j) or\
+                    problem.carrier(state, j) is not None:
+                continue
+            cheapest = min(driven[v] + max(trips[v],
+                                            self.fetch[locations[v]][j])
+                            for v in range(problem.m))
+            if cheapest > longest:
+                longest = cheapest
+        return distance + DISTANCE_TO_TIME * (longest - max(driven))
+
+    def evaluate(self, state):
+        # without the distances driven, assume the vehicle that drove the
+        # most has the shortest trip left, as h7 does
+        locations, trips = self.trips(state)
+        distance = max(IncrementalH6.evaluate(self, state)[0], sum(trips))
+        return distance + DISTANCE_TO_TIME * min(trips), None
+
+    def evaluateNode(self, node):
+        return self.bound(node.getState(), node.vehicleDistances), None
+
+    def updateNode(self, node):
+        return self.evaluateNode(node)
+
+# Incremental version of each heuristic:
+INCREMENTAL = {h1: IncrementalHeuristic, h2: IncrementalH2,
+                h3: IncrementalH3, h4: IncrementalH4, h5: IncrementalH5,
+                h6: IncrementalH6, h7: IncrementalH7}
+
 def metric(point1, point2):
     """
     Return Manhattan distance.
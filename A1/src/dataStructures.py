@@ -1,6 +1,4 @@
-import queue as Queue
-import heapq
-import sys
+from collections import deque, OrderedDict
 
 """
     Data structures file that defines and implements the "backbone" of the
@@ -16,40 +14,186 @@ import sys
 """
 
 class HashableDictionary():
-    table = None
-    name = None
+    """
+        Dictionary that can be hashed and compared, e.g. to be part of a
+        State. Entries are kept in insertion order, which is part of the
+        identity, and the hash is computed once until the next change.
+    """
+    __slots__ = ("table", "name", "hashValue")
 
     def __init__(self, n):
         self.table = {}
         self.name = n
+        self.hashValue = None
 
     def __hash__(self):
-        ret = hash((self.name, *((k,v) for k,v in self.table.items())))
-        return ret
+        if self.hashValue is None:
+            self.hashValue = hash((self.name, *self.table.items()))
+        return self.hashValue
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, HashableDictionary):
+            return False
+        return self.name == other.name and len(self.table) == len(other.table)\
+            and all(a == b for a, b in zip(self.table.items(),
+                                            other.table.items()))
 
     def __getitem__(self, index):
-        return self.table[hash(index)]
+        return self.table[index]
 
     def __contains__(self, index):
-        return (hash(index) in self.table)
+        return index in self.table
 
     def __setitem__(self, index, item):
-        self.table[hash(index)] = item
+        self.table[index] = item
+        self.hashValue = None
 
     def __len__(self):
         return len(self.table)
 
     def clone(self):
         copy = HashableDictionary(self.name)
-        for k,v in self.table.items():
-            copy[hash(k)] = v
+        copy.table = self.table.copy()
+        copy.hashValue = self.hashValue
         return copy
 
     def items(self):
         return self.table.items()
 
     def pop(self, index):
-        self.table.pop(hash(index))
+        self.table.pop(index)
+        self.hashValue = None
+
+# Bits of a key used at each level of a PersistentDictionary:
+TRIE_BITS = 3
+TRIE_WIDTH = 1 << TRIE_BITS
+TRIE_MASK = TRIE_WIDTH - 1
+_ABSENT = object()
+
+class PersistentDictionary():
+    """
+        Dictionary with small non-negative integer keys that shares its
+        storage with its clones. Entries are the leaves of a trie of
+        TRIE_WIDTH-tuples indexed by TRIE_BITS bits of the key at a time,
+        so clone() is O(1) and a change only copies the tuples on the path
+        to its key, O(log n) instead of the O(n) of copying a dictionary.
+        The tuples are never changed, only replaced. Entries are listed,
+        hashed and compared in key order.
+    """
+    __slots__ = ("root", "shift", "size", "name", "hashValue")
+
+    def __init__(self, n):
+        self.root = (_ABSENT,) * TRIE_WIDTH
+        self.shift = 0 # bits of the key below the root level
+        self.size = 0
+        self.name = n
+        self.hashValue = None
+
+    def __hash__(self):
+        if self.hashValue is None:
+            self.hashValue = hash((self.name, *self.items()))
+        return self.hashValue
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, PersistentDictionary):
+            return False
+        if self.name != other.name or self.size != other.size:
+            return False
+        # tuples compare their entries by identity first, which settles it
+        # for interned entries, unless the tries differ in shape:
+        if self.shift == other.shift and self.root == other.root:
+            return True
+        return all(a == b for a, b in zip(self.items(), other.items()))
+
+    def find(self, index):
+        """ Return the entry for index, _ABSENT if there is none """
+        if self.shift == 0:
+            return self.root[index] if 0 <= index < TRIE_WIDTH else _ABSENT
+        if index >> self.shift >> TRIE_BITS:
+            return _ABSENT
+        node = self.root
+        shift = self.shift
+        while shift > 0:
+            node = node[(index >> shift) & TRIE_MASK]
+            if node is _ABSENT:
+                return _ABSENT
+            shift -= TRIE_BITS
+        return node[index & TRIE_MASK]
+
+    def __getitem__(self, index):
+        if self.shift == 0 and 0 <= index < TRIE_WIDTH:
+            item = self.root[index] # the common case, without a call
+        else:
+            item = self.find(index)
+        if item is _ABSENT:
+            raise KeyError(index)
+        return item
+
+    def __contains__(self, index):
+        if self.shift == 0 and 0 <= index < TRIE_WIDTH:
+            return self.root[index] is not _ABSENT
+        return self.find(index) is not _ABSENT
+
+    def assign(self, node, shift, index, item):
+        """ Return a copy of node with the entry for index replaced """
+        slot = (index >> shift) & TRIE_MASK
+        if shift > 0:
+            child = node[slot]
+            if child is _ABSENT:
+                child = (_ABSENT,) * TRIE_WIDTH
+            item = self.assign(child, shift - TRIE_BITS, index, item)
+        return node[:slot] + (item,) + node[slot + 1:]
+
+    def __setitem__(self, index, item):
+        while index >> self.shift >> TRIE_BITS:
+            # one more level for larger keys:
+            self.root = (self.root,) + (_ABSENT,) * (TRIE_WIDTH - 1)
+            self.shift += TRIE_BITS
+        if self.find(index) is _ABSENT:
+            self.size += 1
+        self.root = self.assign(self.root, self.shift, index, item)
+        self.hashValue = None
+
+    def __len__(self):
+        return self.size
+
+    def clone(self):
+        copy = PersistentDictionary(self.name)
+        copy.root = self.root
+        copy.shift = self.shift
+        copy.size = self.size
+        copy.hashValue = self.hashValue
+        return copy
+
+    def items(self):
+        """ Return the (key, entry) pairs in key order """
+        if self.shift == 0:
+            return [(key, item) for key, item in enumerate(self.root)
+                        if item is not _ABSENT]
+        return self.entries(self.root, self.shift, 0)
+
+    def entries(self, node, shift, base):
+        """ Generate the (key, entry) pairs under a node of the trie """
+        for slot in range(TRIE_WIDTH):
+            child = node[slot]
+            if child is _ABSENT:
+                continue
+            key = base | (slot << shift)
+            if shift > 0:
+                yield from self.entries(child, shift - TRIE_BITS, key)
+            else:
+                yield key, child
+
+    def pop(self, index):
+        if self.find(index) is _ABSENT:
+            raise KeyError(index)
+        self.root = self.assign(self.root, self.shift, index, _ABSENT)
+        self.size -= 1
+        self.hashValue = None
 
 class StateStack():
     """
@@ -103,9 +247,11 @@ class StateQueue():
 
     def __init__(self):
         """
-            Constructor that initializes the queue.
+            Constructor that initializes the queue. A deque is used rather
+            than queue.Queue since the search is single threaded and has no
+            use for its locking.
         """
-        self.q = Queue.Queue()
+        self.q = deque()
 
     def dequeue(self):
         """
@@ -113,7 +259,7 @@ class StateQueue():
             :return: next state.
         """
         self.num_el -= 1
-        return self.q.get()
+        return self.q.popleft()
 
     def enqueue(self, state):
         """
@@ -121,7 +267,7 @@ class StateQueue():
         :param state: the state to be added to the queue.
         """
 
-        self.q.put(state)
+        self.q.append(state)
         self.num_el += 1
 
     def isEmpty(self):
@@ -129,7 +275,7 @@ class StateQueue():
         Determine if queue is empty.
         :return: Boolean -- indicating whether or not if the queue is empty.
         """
-        return self.q.empty()
+        return self.num_el == 0
 
     def getNumEl(self):
         """
@@ -140,7 +286,9 @@ class StateQueue():
 
 class StateHeap():
     """
-        A heap based priority queue:
+        An indexed binary heap based priority queue. Every queued state knows
+        its position in the heap, so lowering the cost of a queued state is
+        a single sift instead of a scan and re-heapify of the whole list.
     """
     lookup = None
     heapList = None
@@ -151,63 +299,124 @@ class StateHeap():
     class HeapElement():
 
         item = None
-        parent = None
+        position = None
+        key = None
 
-        def __init__(self, _item, _parent):
+        def __init__(self, _item, _position, _key):
             self.item = _item
-            self.parent = _parent
-
-        # Solely for the purposes of the heap algorithms:
-        def __eq__(self, other):
-            return self.parent.equality(self.item, other.item)
-
-        # Solely for the purposes of the heap algorithms:
-        def __lt__(self, other):
-            return self.parent.comparator(self.item, other.item)
+            self.position = _position
+            self.key = _key
 
     def __init__(self, _equality, _comparator):
         """
         Constructor that initializes the heap.
         """
-        self.lookup = HashableDictionary("STATE_HEAP") # dictionary containing the costs of each item
+        self.lookup = HashableDictionary("STATE_HEAP") # heap element of each queued state
         self.heapList = []
         self.equality = _equality
         self.comparator = _comparator
 
-    def enqueue(self, item):
+    def place(self, element, position):
         """
-            Enqueue the given item.
+            Put an element at the given position of the heap list.
         """
+        self.heapList[position] = element
+        element.position = position
+
+    def siftUp(self, position):
+        """
+            Move the element at position up until its parent is not larger.
+            :return: the final position of the element.
+        """
+        element = self.heapList[position]
+        while position > 0:
+            parentPosition = (position - 1) >> 1
+            parent = self.heapList[parentPosition]
+            if not self.comparator(element.item, parent.item):
+                break
+            self.place(parent, position)
+            position = parentPosition
+        self.place(element, position)
+        return position
+
+    def siftDown(self, position):
+        """
+            Move the element at position down until no child is smaller.
+            :return: the final position of the element.
+        """
+        size = len(self.heapList)
+        element = self.heapList[position]
+        child = 2 * position + 1
+        while child < size:
+            right = child + 1
+            if right < size and self.comparator(self.heapList[right].item,
+                                                self.heapList[child].item):
+                child = right
+            if not self.comparator(self.heapList[child].item, element.item):
+                break
+            self.place(self.heapList[child], position)
+            position = child
+            child = 2 * position + 1
+        self.place(element, position)
+        return position
+
+    def enqueue(self, item, key=None):
+        """
+            Enqueue the given item. If its state is already queued, the
+            queued item is replaced when the new one is cheaper.
+            :param key: what identifies the item's state in the queue, the
+                        state itself when None.
+        """
+        if key is None:
+            key = item.getState()
         # if seen before
-        if item.getState() in self.lookup:
-            if item.getCost() < self.lookup[item.getState()]:
-                seen_count = 0
-                self.lookup[item.getState()] = item.getCost()
-                for i in range(len(self.heapList)):
-                    if self.heapList[i].item == item:
-                        self.heapList[i] = StateHeap.HeapElement(item, self)
-                        heapq.heapify(self.heapList)
-                        break
-
-                # Check counts:
-                for i in range(len(self.heapList)):
-                    if self.heapList[i].item == item:
-                        seen_count += 1
-                if seen_count != 1:
-                    print("Seen Count:", seen_count, file=sys.stderr)
-                # assert(seen_count == 1)
+        if key in self.lookup:
+            element = self.lookup[key]
+            if item.getCost() < element.item.getCost():
+                element.item = item
+                if self.siftUp(element.position) == element.position:
+                    self.siftDown(element.position)
         else:
-            self.lookup[item.getState()] = item.getCost()
-            heapq.heappush(self.heapList, StateHeap.HeapElement(item, self))
+            element = StateHeap.HeapElement(item, len(self.heapList), key)
+            self.lookup[key] = element
+            self.heapList.append(element)
+            self.siftUp(element.position)
+
+    def queuedCost(self, key):
+        """
+            Return the cost of the queued item holding the given state (or
+            enqueued with the given key), None if it is not queued.
+        """
+        if key in self.lookup:
+            return self.lookup[key].item.getCost()
+        return None
 
     def dequeue(self):
         """
             Dequeue the minimum element in the heap
         """
-        ret = heapq.heappop(self.heapList).item
-        assert(ret.getState() in self.lookup)
-        self.lookup.pop(ret.getState())
-        return ret
+        top = self.heapList[0]
+        last = self.heapList.pop()
+        if len(self.heapList) > 0:
+            self.place(last, 0)
+            self.siftDown(0)
+        assert(top.key in self.lookup)
+        self.lookup.pop(top.key)
+        return top.item
+
+    def remove(self, key):
+        """
+            Remove the queued item with the given key from the heap.
+            :return: the removed item.
+        """
+        element = self.lookup[key]
+        self.lookup.pop(key)
+        last = self.heapList.pop()
+        if last is not element:
+            self.place(last, element.position)
+            if self.siftUp(last.position) == element.position:
+                self.siftDown(element.position)
+        return element.item
 
     def isEmpty(self):
         """
@@ -221,3 +430,50 @@ class StateHeap():
         assert(len(self.heapList) == len(self.lookup))
         return len(self.heapList)
 
+class LRUCache():
+    """
+        A memo of bounded size that forgets the least recently used entry
+        when it is full, counting its hits and misses.
+    """
+    table = None
+    size = 0
+    hits = 0
+    misses = 0
+
+    def __init__(self, _size):
+        """
+            Constructor that initializes the cache.
+            :param _size: the most entries kept.
+        """
+        self.table = OrderedDict()
+        self.size = _size
+
+    def get(self, key):
+        """
+            Return the value stored for key, None if there is none.
+        """
+        value = self.table.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.table.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+            Store a value for key, forgetting the oldest entry if full.
+        """
+        self.table[key] = value
+        self.table.move_to_end(key)
+        if len(self.table) > self.size:
+            self.table.popitem(last=False)
+
+    def pop(self, key):
+        """
+            Forget the entry stored for key, if any.
+        """
+        self.table.pop(key, None)
+
+    def __len__(self):
+        return len(self.table)
@@ -0,0 +1,148 @@
+from problem import Problem, WAITING, DELIVERED
+from problemState import State, Vehicle, Package
+from dataStructures import PersistentDictionary
+from searchNode import SearchNode, BEGIN
+from costUtils import *
+
+"""
+    Packed problem class that solves the MNKY problem on a flat state
+    encoding. A packed state is a single immutable tuple of m + n integers:
+
+        (pos_0, ..., pos_m-1, status_0, ..., status_n-1)
+
+    where pos_i is the index of vehicle i's position in the problem's table
+    of points (0 is the origin, 1..n are the package sources and
+    n+1..2n are the package destinations) and status_j is WAITING, DELIVERED
+    or the index of the vehicle carrying package j. Vehicle rooms are not
+    stored since they follow from the package statuses.
+
+    Authors: Mahmud Ahzam*, Tayab Soomro*, Flaviu Vadan*
+    Class: CMPT317
+    Instructor: Michael Horsch
+    Assignment: 1
+
+    * - all authors equally contributed to the implementation
+"""
+
+class PackedProblem(Problem):
+    """ Problem class running on packed tuple states """
+    atOrigin = None
+    packedInit = None
+
+    def __init__(self, _m, _n, _k, _y, packs):
+        """
+        Initializes a packed problem.
+        :param _m: number of vehicles.
+        :param _n: number of packages.
+        :param _k: capacity of each vehicle.
+        :param _y: dimension of the space.
+        """
+        Problem.__init__(self, _m, _n, _k, _y, packs)
+        self.atOrigin = [pt == self.points[0] for pt in self.points]
+        self.packedInit = tuple([0] * _m + [WAITING] * _n)
+
+    def rooms(self, state):
+        """
+        Return the leftover room of every vehicle in a packed state.
+        :param state: packed state.
+        :return: list of rooms indexed by vehicle.
+        """
+        rooms = [self.k] * self.m
+        for status in state[self.m:]:
+            if status >= 0:
+                rooms[status] -= 1
+        return rooms
+
+    def getInitState(self):
+        """
+        Return the root search node.
+        :return: search node holding the packed initial state.
+        """
+        return SearchNode(self.packedInit, None, BEGIN, [0] * self.m)
+
+    def childState(self, node, v, j, to):
+        """
+        Build the packed state reached by a move.
+        :param node: search node the move starts from.
+        :param v: the moving vehicle.
+        :param j: the package picked up or delivered, -1 for a return.
+        :param to: the point index the vehicle moves to.
+        :return: packed state.
+        """
+        succ = list(node.getState())
+        succ[v] = to
+        if j >= 0:
+            succ[self.m + j] = DELIVERED if succ[self.m + j] == v else v
+        return tuple(succ)
+
+    def canonical(self, state):
+        """
+        Key shared by all packed states that only differ by a permutation
+        of the vehicles, see Problem.canonical.
+        """
+        return self.canonicalKey(state[:self.m], state[self.m:])
+
+    def pack(self, state):
+        """ Packed states are packed already """
+        return state
+
+    def isGoal(self, state):
+        """
+        Returns whether the given packed state is the goal state.
+        :param state: a packed state.
+        :return: true if goal state, false otherwise.
+        """
+        for v in range(self.m):
+            if not self.atOrigin[state[v]]:
+                return False
+        for status in state[self.m:]:
+            if status != DELIVERED:
+                return False
+        return True
+
+    def decode(self, state):
+        """
+        Expand a packed state into the equivalent State object.
+        :param state: a packed state.
+        :return: State.
+        """
+        rooms = self.rooms(state)
+        vehicles = PersistentDictionary("VEHICLES")
+        packages = PersistentDictionary("PACKAGES")
+        with self.pool:
+            for v in range(self.m):
+                vehicles[v] = Vehicle(self.points[state[v]], v, rooms[v])
+            for j in range(self.n):
+                status = state[self.m + j]
+                if status != DELIVERED:
+                    packages[j] = Package(self.points[1 + j],
+                        self.points[1 + self.n + j], j,
+                        None if status == WAITING else status)
+        state = State(vehicles, packages)
+        state.hashValue = self.stateHash(state)
+        return state
+
+    def heuristic(self, h):
+        """
+        Return a version of one of the costUtils heuristics that works on
+        packed states. Unknown heuristics are evaluated on the decoded State.
+        :param h: heuristic function over State objects.
+        :return: heuristic function over packed states.
+        """
+        if h in INCREMENTAL:
+            inc = INCREMENTAL[h](self)
+            return lambda state: inc.evaluate(state)[0]
+        return lambda state: h(self.decode(state))
+
+    def vehicleLocation(self, state, v):
+        """ Return the point index of vehicle v in a packed state """
+        return state[v]
+
+    def isDelivered(self, state, j):
+        """ Return whether package j is delivered in a packed state """
+        return state[self.m + j] == DELIVERED
+
+    def carrier(self, state, j):
+        """ Return the vehicle carrying package j, None if it is waiting """
+        status = state[self.m + j]
+        return None if status == WAITING else status
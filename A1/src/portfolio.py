@@ -0,0 +1,210 @@
+from problem import Problem
+from packedProblem import PackedProblem
+from search import caseJobs, reportLabel, runAlgorithm
+from multiprocessing import Process, Pipe
+from multiprocessing.connection import wait
+import os, resource, sys, time, traceback
+
+"""
+    Portfolio runner for the MNKY problem. Every (problem, algorithm,
+    heuristic) pair is a job run in its own worker process, with at most
+    a fixed number of workers at a time, a wall clock timeout and an
+    address space cap per job. The report lines are the same ones
+    search.py prints, in the same order, so a sweep over the test cases
+    takes about as long as its slowest job instead of the sum of all jobs.
+
+    Usage: python3 portfolio.py [options] [test case files or folders]
+        --run-bfs, --run-iddfs, --run-idastar, --run-bidirectional,
+        --packed, --print-plan
+                        as in search.py;
+        --workers N     number of jobs run at a time (default: cpu count);
+        --timeout S     seconds before a job is killed (default: none);
+        --memory MB     address space cap of each job (default: none).
+
+    Authors: Mahmud Ahzam*, Tayab Soomro*, Flaviu Vadan*
+    Class: CMPT317
+    Instructor: Michael Horsch
+    Assignment: 1
+
+    * - all authors equally contributed to the implementation
+"""
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))), "tests", "test_cases")
+
+def problemFromText(text, packed=False):
+    """
+        Read a problem from the text of a test case.
+        :param text: contents of a test case file.
+        :param packed: whether to build a PackedProblem.
+    """
+    cls = PackedProblem if packed else Problem
+    return cls.parseProblem(iter(text.splitlines()).__next__)
+
+def work(conn, target, args, memory):
+    """
+        Worker process body: run target(*args) and send back its result.
+        :param conn: end of the pipe to the parent.
+        :param memory: address space cap in bytes, None for no cap.
+    """
+    if memory is not None:
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        except (ValueError, OSError):
+            # the cap is not supported here, e.g. on macOS, run without it
+            pass
+    try:
+        conn.send((None, target(*args)))
+    except MemoryError:
+        conn.send(("out of memory", None))
+    except Exception as e:
+        conn.send(("failed: " + repr(e), traceback.format_exc()))
+    conn.close()
+
+def runJobs(target, jobs, workers=None, timeout=None, memory=None,
+                output=None):
+    """
+        Run target on every job's arguments, each time in a new worker
+        process.
+        :param target: function run by the workers.
+        :param jobs: list of argument tuples of target.
+        :param workers: number of jobs run at a time, None for cpu count.
+        :param timeout: seconds before a job is killed, None for no limit.
+        :param memory: address space cap in bytes of each job.
+        :param output: called with the index and result of each job, in
+                        job order, as soon as the job and all the ones
+                        before it are done.
+        :return: list of (failure, value) pairs, one per job, where
+                 failure is None or says why the job gave no value; the
+                 value of a job that raised is its traceback.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    results = [None] * len(jobs)
+    reported = 0
+    started = 0
+    running = {} # pipe end -> (job index, process, deadline)
+    while reported < len(jobs):
+        while started < len(jobs) and len(running) < workers:
+            parentConn, childConn = Pipe(duplex=False)
+            process = Process(target=work, args=(childConn, target,
+                                tuple(jobs[started]), memory))
+            process.start()
+            childConn.close()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            running[parentConn] = (started, process, deadline)
+            started += 1
+
+        deadlines = [d for (_, _, d) in running.values() if d is not None]
+        wait_for = None
+        if len(deadlines) > 0:
+            wait_for = max(0, min(deadlines) - time.monotonic())
+        for conn in wait(list(running), wait_for):
+            index, process, deadline = running.pop(conn)
+            try:
+                results[index] = conn.recv()
+            except EOFError:
+                # the worker died without reporting, e.g. it was killed
+                # by the system for using too much memory:
+                results[index] = ("crashed", None)
+            conn.close()
+            process.join()
+
+        now = time.monotonic()
+        for conn, (index, process, deadline) in list(running.items()):
+            if deadline is not None and now >= deadline:
+                process.terminate()
+                process.join()
+                conn.close()
+                del running[conn]
+                results[index] = ("timed out after " + str(timeout) + "s",
+                                    None)
+
+        while reported < len(jobs) and results[reported] is not None:
+            if output is not None:
+                output(reported, results[reported])
+            reported += 1
+    return results
+
+def runJob(text, packed, algorithm, i, printPlan):
+    """ Solve one portfolio job and return its report lines """
+    return runAlgorithm(problemFromText(text, packed), algorithm, i, printPlan)
+
+def runPortfolio(jobs, workers=None, timeout=None, memory=None,
+                    output=None):
+    """
+        Run search jobs in worker processes, see runJobs.
+        :param jobs: list of (text, packed, algorithm, i, printPlan) tuples,
+                        the arguments of runJob.
+        :param output: called with the index and report lines of each job,
+                        in job order.
+        :return: list of the report lines of every job.
+    """
+    def lines(index, result):
+        failure, value = result
+        if failure is None:
+            return value
+        return ["----------",
+                reportLabel(jobs[index][2], jobs[index][3]) + ": " + failure]
+
+    report = None
+    if output is not None:
+        report = lambda index, result: output(index, lines(index, result))
+    results = runJobs(runJob, jobs, workers, timeout, memory, report)
+    return [lines(index, results[index]) for index in range(len(jobs))]
+
+def caseFiles(paths):
+    """ Expand test case folders into the files they hold, sorted """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, f) for f in sorted(os.listdir(path))]
+        else:
+            files.append(path)
+    return files
+
+if __name__ == '__main__':
+
+    runBFS = "--run-bfs" in sys.argv
+    runIDDFS = "--run-iddfs" in sys.argv
+    runIDAStar = "--run-idastar" in sys.argv
+    runBidirectional = "--run-bidirectional" in sys.argv
+    packed = "--packed" in sys.argv
+    printPlan = "--print-plan" in sys.argv
+    workers = None
+    timeout = None
+    memory = None
+    paths = []
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg == "--workers":
+            workers = int(next(args))
+        elif arg == "--timeout":
+            timeout = float(next(args))
+        elif arg == "--memory":
+            memory = int(float(next(args)) * 1024 * 1024)
+        elif not arg.startswith("--"):
+            paths.append(arg)
+    if len(paths) == 0:
+        paths.append(TEST_DIR)
+
+    files = caseFiles(paths)
+    perCase = caseJobs(runBFS, runIDDFS, runIDAStar,
+                        runBidirectional=runBidirectional)
+    jobs = []
+    for f in files:
+        with open(f) as case:
+            text = case.read()
+        for algorithm, i in perCase:
+            jobs.append((text, packed, algorithm, i, printPlan))
+
+    def output(index, lines):
+        case, job = divmod(index, len(perCase))
+        name = os.path.basename(files[case])
+        if job == 0:
+            print("\n\n________________________________________________________\n" + name + "\n")
+        print("\n".join(lines), flush=True)
+        if job == len(perCase) - 1:
+            print("\nFinished " + name + "\n", file=sys.stderr)
+
+    runPortfolio(jobs, workers, timeout, memory, output)
@@ -1,6 +1,10 @@
-from problemState import State, Vehicle, Package
-from dataStructures import HashableDictionary
-from searchNode import SearchNode
+from problemState import State, Vehicle, Package, zobristKey
+from dataStructures import PersistentDictionary
+from searchNode import SearchNode, DISTANCE_TO_TIME, BEGIN, PICKUP,\
+                        DELIVER, RETURN, moveCode
+from unique import InternPool
+from costUtils import INCREMENTAL, metric, euclidean_metric
+from array import array
 import copy
 
 
@@ -18,6 +22,12 @@ import copy
     * - all authors equally contributed to the implementation
 """
 
+# Package statuses that are not vehicle indices, used by packed and
+# canonical states. -1 is not used since hash(-1) == hash(-2), which would
+# make states that differ there collide in every dictionary keyed on them:
+WAITING = -3
+DELIVERED = -2
+
 class Problem():
     """ Problem Class """
     m = None
@@ -25,6 +35,16 @@ class Problem():
     k = None
     y = None
     initState = None
+    pool = None
+    sources = None
+    destinations = None
+    points = None
+    pointIndex = None
+    samePoint = None
+    manhattan = None
+    euclidean = None
+    vehicleKeys = None
+    packageKeys = None
 
     def __init__(self, _m, _n, _k, _y, packs):
         """
@@ -38,22 +58,76 @@ class Problem():
         self.n = _n
         self.k = _k
         self.y = _y
-        vehicles = HashableDictionary("VEHICLES")
-        packages = HashableDictionary("PACKAGES")
-        for i in range(_m):
-            vehicles[i] = Vehicle(tuple([0 for i in range(_y)]), i, _k)
-        for j in range(len(packs)):
-            packages[j] = Package(packs[j][0], packs[j][1], j, None)
-        self.initState = State(vehicles, packages)
+        self.sources = [packs[j][0] for j in range(len(packs))]
+        self.destinations = [packs[j][1] for j in range(len(packs))]
+        # Table of every place a vehicle can be: 0 is the origin, 1..n are
+        # the package sources and n+1..2n are the package destinations.
+        self.points = [self.getOrigin()] + self.sources + self.destinations
+        self.pointIndex = {}
+        for i in reversed(range(len(self.points))):
+            self.pointIndex[self.points[i]] = i
+        # Points sharing coordinates are the same place, always use the
+        # first index so that they are told apart by coordinates only:
+        self.samePoint = [self.pointIndex[pt] for pt in self.points]
+        # Distances between all points, computed once:
+        self.manhattan = [[metric(a, b) for b in self.points]
+                            for a in self.points]
+        self.euclidean = [[euclidean_metric(a, b) for b in self.points]
+                            for a in self.points]
+        # Zobrist keys: a State hashes to the XOR of one key for each
+        # vehicle's (point, room) and each package's carrier (None for
+        # waiting, delivered packages have no key), so that a move updates
+        # the hash of its parent state by a few XORs. They are the keys
+        # State.__hash__ draws from the contents, looked up in tables:
+        self.vehicleKeys = [[[zobristKey(0, v, pt, r) for r in range(_k + 1)]
+                                for pt in self.points] for v in range(_m)]
+        self.packageKeys = [[zobristKey(1, j, c) for c in range(_m)] +
+                                [zobristKey(1, j, -1)]
+                                for j in range(len(packs))]
+        # unique Vehicles, Packages and States of this problem only:
+        self.pool = InternPool()
+        with self.pool:
+            vehicles = PersistentDictionary("VEHICLES")
+            packages = PersistentDictionary("PACKAGES")
+            for i in range(_m):
+                vehicles[i] = Vehicle(tuple([0 for i in range(_y)]), i, _k)
+            for j in range(len(packs)):
+                packages[j] = Package(packs[j][0], packs[j][1], j, None)
+            self.initState = State(vehicles, packages)
+        self.initState.hashValue = self.stateHash(self.initState)
+
+    def vehicleKey(self, v, point, room):
+        """ Zobrist key of vehicle v at a point index with the given room """
+        return self.vehicleKeys[v][self.samePoint[point]][room]
+
+    def packageKey(self, j, carrier):
+        """ Zobrist key of package j carried by carrier, None if waiting """
+        return self.packageKeys[j][self.m if carrier is None else carrier]
+
+    def stateHash(self, state):
+        """
+        Compute the Zobrist hash of a State from scratch, see childState for
+        the incremental version.
+        :param state: a State.
+        :return: XOR of the keys of its vehicles and packages.
+        """
+        h = 0
+        for v, vehicle in state.getVehicles().items():
+            h ^= self.vehicleKey(v, self.pointIndex[vehicle.getPosition()],
+                                    vehicle.getRoom())
+        for j, package in state.getPackages().items():
+            h ^= self.packageKey(j, package.carrier())
+        return h
 
     def getInitState(self):
         """
         Return current state.
         :return: state.
         """
-        return SearchNode(self.initState, None, "Begin\n")
+        return SearchNode(self.initState, None, BEGIN, [0] * self.m)
 
-    def readProblem():
+    @classmethod
+    def readProblem(cls):
         """
         Reads a problem from standard input.
         Input format: <m>
@@ -66,99 +140,210 @@ class Problem():
                       ...
                       sn1 sn2 sn3 ... sny | dn1 dn2 dn3 ... dny
         """
-        m = int(input())
-        n = int(input())
-        k = int(input())
-        y = int(input())
+        return cls.parseProblem(input)
+
+    @classmethod
+    def parseProblem(cls, readLine):
+        """
+        Reads a problem in the readProblem format.
+        :param readLine: function returning the next line of input.
+        """
+        m = int(readLine())
+        n = int(readLine())
+        k = int(readLine())
+        y = int(readLine())
         packages = []
         for i in range(n):
-            interm = list(map(float,input().strip().split(' ')))
+            interm = list(map(float,readLine().strip().split(' ')))
             src = tuple(interm[0:int(len(interm)/2)])
             des =  tuple(interm[int(len(interm)/2):len(interm)])
             packages.append((src, des))
 
-        return Problem(m, n, k, y, packages)
+        return cls(m, n, k, y, packages)
+
+    @classmethod
+    def readProblems(cls, lines, name="input"):
+        """
+        Reads problems in the readProblem format one after the other from
+        a stream of lines, such as an open file. Blank lines between
+        problems are skipped. Each problem is read when it is asked for.
+        :param lines: iterable of lines.
+        :param name: name of the stream, e.g. its file, for errors.
+        :return: generator of problems.
+        :raises ValueError: if the lines end in the middle of a problem.
+        """
+        lines = iter(lines)
+        number = 0
+        for line in lines:
+            if line.strip() == "":
+                continue
+            number += 1
+            first = [line]
+            readLine = lambda: first.pop() if first else next(lines)
+            try:
+                problem = cls.parseProblem(readLine)
+            except StopIteration:
+                raise ValueError("problem " + str(number) + " of " + name +
+                                    " is truncated") from None
+            yield problem
+
+    @classmethod
+    def fromRecord(cls, record):
+        """
+        Builds a problem from a dictionary, e.g. a line of a JSONL file,
+        with the keys m, n, k, y and packages, a list of [source,
+        destination] coordinate lists.
+        """
+        packages = [(tuple(map(float, src)), tuple(map(float, des)))
+                        for src, des in record["packages"]]
+        return cls(int(record["m"]), int(record["n"]), int(record["k"]),
+                    int(record["y"]), packages)
+
+    def moves(self, node):
+        """
+        All legal moves from a search node, without building any states or
+        search nodes. Moves are listed vehicle by vehicle: deliveries and
+        pick ups in package order, then the return to origin.
+        :param node: search node to expand.
+        :return: arrays of the moving vehicle, the package picked up or
+                 delivered (-1 for a return to origin), the point index the
+                 vehicle moves to and the cost of the resulting node.
+        """
+        return self.batchMoves([node])[1:]
+
+    def batchMoves(self, nodes):
+        """
+        All legal moves from a batch of search nodes, see moves.
+        :param nodes: search nodes to expand.
+        :return: array of the index in nodes each move starts from,
+                 followed by the arrays returned by moves.
+        """
+        parents = array('i')
+        vehicles = array('i')
+        packages = array('i')
+        targets = array('i')
+        costs = array('d')
+        for i in range(len(nodes)):
+            node = nodes[i]
+            state = node.getState()
+            rooms = self.rooms(state)
+            for v in range(self.m):
+                at = self.vehicleLocation(state, v)
+                room = rooms[v]
+                for j in range(self.n):
+                    if self.isDelivered(state, j):
+                        continue
+                    carrier = self.carrier(state, j)
+                    # Vehicle is not carrying this package and it has no
+                    # more room, it can neither pickup nor deliver it:
+                    if carrier != v and room <= 0:
+                        continue
+                    if carrier == v:
+                        to = self.destination(j)
+                    elif room > 0 and carrier is None:
+                        to = self.source(j)
+                    else:
+                        continue
+                    parents.append(i)
+                    vehicles.append(v)
+                    packages.append(j)
+                    targets.append(to)
+                    costs.append(self.moveCost(node, v, at, to))
+
+                # Vehicle is empty, an option is to go back to origin:
+                if room == self.k and self.points[at] != self.points[0]:
+                    parents.append(i)
+                    vehicles.append(v)
+                    packages.append(-1)
+                    targets.append(0)
+                    costs.append(self.moveCost(node, v, at, 0))
+        return parents, vehicles, packages, targets, costs
+
+    def moveCost(self, node, v, at, to):
+        """
+        Return the cost of the node reached by vehicle v driving between
+        two points, worked out the same way SearchNode does.
+        """
+        distances = self.travel(node, v, at, to)
+        return sum(distances) + DISTANCE_TO_TIME * max(distances)
+
+    def childState(self, node, v, j, to):
+        """
+        Build the state reached by a move, interned in the problem's pool.
+        :param node: search node the move starts from.
+        :param v: the moving vehicle.
+        :param j: the package picked up or delivered, -1 for a return.
+        :param to: the point index the vehicle moves to.
+        :return: State.
+        """
+        state = node.getState()
+        vehicle = state.getVehicles()[v]
+        vehicles = state.getVehicles().clone()
+        packages = state.getPackages().clone()
+        # the parent's hash with the keys of what the move changes swapped:
+        h = hash(state) ^ self.vehicleKey(v, self.vehicleLocation(state, v),
+                                            vehicle.getRoom())
+        with self.pool:
+            if j < 0:
+                vehicles[v] = Vehicle(self.points[to], v, vehicle.getRoom())
+            elif packages[j].carrier() == v:
+                # Change copied state to reflect a delivery:
+                vehicles[v] = Vehicle(self.points[to], v,
+                                        vehicle.getRoom() + 1)
+                packages.pop(j)
+                h ^= self.packageKey(j, v)
+            else:
+                # Change copied state to reflect a pick up of package j:
+                vehicles[v] = Vehicle(self.points[to], v,
+                                        vehicle.getRoom() - 1)
+                p = packages[j]
+                packages[j] = Package(p.getPosition(), p.getDestination(),
+                                        j, v)
+                h ^= self.packageKey(j, None) ^ self.packageKey(j, v)
+        # Make sure that no vehicle carries beyond capacity:
+        assert(vehicles[v].getRoom() <= self.k)
+        assert(vehicles[v].getRoom() >= 0)
+        succ = State(vehicles, packages)
+        succ.hashValue = h ^ self.vehicleKey(v, to, vehicles[v].getRoom())
+        return succ
+
+    def materialize(self, node, moves, i, state=None):
+        """
+        Build the search node for one of the moves of a node.
+        :param node: search node the move starts from.
+        :param moves: arrays returned by moves(node).
+        :param i: index of the move in the arrays.
+        :param state: the state reached by the move if already built.
+        :return: SearchNode.
+        """
+        vehicles, packages, targets, costs = moves
+        v = vehicles[i]
+        j = packages[i]
+        to = targets[i]
+        if state is None:
+            state = self.childState(node, v, j, to)
+        distances = self.travel(node, v, self.vehicleLocation(
+                                    node.getState(), v), to)
+        if j < 0:
+            code = moveCode(RETURN, v)
+        elif self.carrier(node.getState(), j) == v:
+            code = moveCode(DELIVER, v, j)
+        else:
+            code = moveCode(PICKUP, v, j)
+        return SearchNode(state, node, code, distances)
 
     def successors(self, node):
         """
         Set of possible transitions from the current state.
         :return: list of all possible states.
         """
+        moves = self.moves(node)
+        return [self.materialize(node, moves, i)
+                    for i in range(len(moves[0]))]
 
-        possibleSuccessors = []
-        for k1, v in node.getState().getVehicles().items():
-            for k2, p in node.getState().getPackages().items():
-
-                # Vehicle is not carrying this package and it has no more room:
-                if p.carrier() != v.getIndex() and v.getRoom() <= 0:
-                    # it can neither pickup this package nor deliver it:
-                    continue
-
-                # First, cover the case when you can deliver something
-                # For each package picked up by/moving with v:
-                else:
-                    if p.carrier() == v.getIndex():
-                        # Change copied state to reflect a delivery:
-                        currVehicle = Vehicle(p.getDestination(),\
-                                                v.getIndex(), v.getRoom() + 1)
-                        vehicles = node.getState().getVehicles().clone()
-                        vehicles[v.getIndex()] = currVehicle
-
-                        # Make sure that no vehicle carries beyond capacity:
-                        assert(currVehicle.getRoom() <= self.k)
-                        assert(currVehicle.getRoom() >= 0)
-
-                        packages = node.getState().getPackages().clone()
-                        packages.pop(p.getIndex())
-                        # Append to list of possible states:
-                        planStep = "V" + str(v.getIndex()) + " delivers " +\
-                            "P" + str(p.getIndex()) + "\n"
-                        newNode = SearchNode(State(vehicles,packages),node,
-                                                planStep)
-                        possibleSuccessors.append(newNode)
-
-                    # If the vehicle can pick up more packages:
-                    elif (v.getRoom() > 0) and (p.carrier() is None):
-                        # Change copied state to reflect a pick up of package
-                        # p by v:
-                        currVehicle = Vehicle(p.getPosition(),\
-                                                v.getIndex(), v.getRoom() - 1)
-                        vehicles = node.getState().getVehicles().clone()
-                        vehicles[v.getIndex()] = currVehicle
-
-                        # Make sure that no vehicle carries beyond capacity:
-                        assert(currVehicle.getRoom() <= self.k)
-                        assert(currVehicle.getRoom() >= 0)
-
-                        # Set package as carried
-                        pickUp = Package(p.getPosition(),p.getDestination(),
-                                            p.getIndex(),v.getIndex())
-                        packages = node.getState().getPackages().clone()
-                        packages[p.getIndex()] = pickUp
-
-                        planStep = "V" + str(v.getIndex()) + " picks up " +\
-                            "P" + str(p.getIndex()) + "\n"
-
-                        newNode = SearchNode(State(vehicles,packages),node,
-                                                planStep)
-
-                        # Append to the list of possible states:
-                        possibleSuccessors.append(newNode)
-
-            # Vehicle is empty, an option is to go back to origin:
-            if v.getRoom() == self.k\
-                    and v.getPosition() != tuple([0 for x in range(self.y)]):
-                # Define origin
-                garage = tuple([0 for x in range(self.y)])
-                currVehicle = Vehicle(garage, v.getIndex(),v.getRoom())
-                vehicles = node.getState().getVehicles().clone()
-                vehicles[v.getIndex()] = currVehicle
-                packages = node.getState().getPackages().clone()
-                planStep = "V" + str(v.getIndex()) + " returns to origin\n"
-                newNode = SearchNode(State(vehicles,packages), node, planStep)
-                # Append state to the possible successor
-                possibleSuccessors.append(newNode)
-        return possibleSuccessors
+    def rooms(self, state):
+        """ Return the leftover room of every vehicle in the given state """
+        return [state.getVehicles()[v].getRoom() for v in range(self.m)]
 
     def isGoal(self, state):
         """
@@ -174,6 +359,196 @@ class Problem():
             return False
         return True
 
+    def heuristic(self, h):
+        """
+        Return the heuristic to use on this problem's states.
+        :param h: heuristic function over State objects.
+        :return: heuristic function.
+        """
+        return h
+
+    def incrementalHeuristic(self, h):
+        """
+        Return the incremental version of h bound to this problem.
+        :param h: heuristic function over State objects.
+        :return: IncrementalHeuristic, or None if h has none.
+        """
+        if h in INCREMENTAL:
+            return INCREMENTAL[h](self)
+        return None
+
+    def getOrigin(self):
+        """ Return the coordinates of the origin """
+        return tuple([0 for i in range(self.y)])
+
+    def source(self, j):
+        """ Return the point index package j is picked up from """
+        return self.samePoint[1 + j]
+
+    def destination(self, j):
+        """ Return the point index package j is delivered to """
+        return self.samePoint[1 + self.n + j]
+
+    def travel(self, node, v, at, to):
+        """
+        Return the per-vehicle distances after vehicle v drives between two
+        points.
+        :param node: search node being expanded.
+        :param v: index of the vehicle that moves.
+        :param at: point index the vehicle is at.
+        :param to: point index the vehicle moves to.
+        """
+        distances = node.vehicleDistances
+        return distances[:v] + (distances[v] + self.manhattan[to][at],) +\
+                distances[v + 1:]
+
+    def canonical(self, state):
+        """
+        Return a key shared by all states that only differ by a permutation
+        of the vehicles. Vehicles are interchangeable since they all start
+        at the origin with the same capacity.
+        :param state: a state.
+        :return: tuple of the vehicle positions in canonical order followed
+                 by the package statuses, as in a packed state.
+        """
+        packed = self.pack(state)
+        return self.canonicalKey(packed[:self.m], packed[self.m:])
+
+    def pack(self, state):
+        """
+        Return the packed tuple encoding of a state, see PackedProblem.
+        :param state: a state.
+        :return: tuple of the vehicle positions followed by the package
+                 statuses.
+        """
+        packed = [self.vehicleLocation(state, v) for v in range(self.m)]
+        for j in range(self.n):
+            if self.isDelivered(state, j):
+                packed.append(DELIVERED)
+            else:
+                carrier = self.carrier(state, j)
+                packed.append(WAITING if carrier is None else carrier)
+        return tuple(packed)
+
+    def packedGoal(self):
+        """ Return the packed goal state: everything delivered, at origin """
+        return tuple([0] * self.m + [DELIVERED] * self.n)
+
+    def predecessors(self, packed):
+        """
+        Backward successor function over packed states: every packed state
+        with a move leading to the given one. Each move is undone with the
+        vehicle coming from any point its last move could have left it at,
+        see consistent, so that predecessors the initial state can never
+        reach are not generated.
+        :param packed: packed state.
+        :return: list of packed predecessor states.
+        """
+        m = self.m
+        points = sorted(set(self.samePoint))
+        loads = [0] * m
+        for status in packed[m:]:
+            if status >= 0:
+                loads[status] += 1
+        result = []
+        for v in range(m):
+            at = packed[v]
+            for j in range(self.n):
+                status = packed[m + j]
+                if status == DELIVERED and at == self.destination(j)\
+                        and loads[v] < self.k:
+                    # undo v delivering j
+                    undone = v
+                elif status == v and at == self.source(j):
+                    # undo v picking up j
+                    undone = WAITING
+                else:
+                    continue
+                for before in points:
+                    pred = list(packed)
+                    pred[v] = before
+                    pred[m + j] = undone
+                    if self.consistent(pred):
+                        result.append(tuple(pred))
+            if at == 0 and loads[v] == 0:
+                # undo v returning to the origin
+                for before in points:
+                    if before != 0:
+                        pred = list(packed)
+                        pred[v] = before
+                        if self.consistent(pred):
+                            result.append(tuple(pred))
+        return result
+
+    def consistent(self, packed):
+        """
+        Tell whether every vehicle can be where it is in a packed state,
+        i.e. where its last move left it: at the origin when it is empty
+        (it never moved or it returned), at the source of a package it
+        carries, or at the destination of a package it delivered last,
+        which is a different delivered package for each such vehicle.
+        :param packed: packed state, or a list of its entries.
+        """
+        m = self.m
+        # vehicles that must have delivered a package last:
+        delivering = []
+        for v in range(m):
+            at = packed[v]
+            empty = True
+            picked = False
+            for j in range(self.n):
+                if packed[m + j] == v:
+                    empty = False
+                    picked = picked or self.source(j) == at
+            if not picked and not (at == 0 and empty):
+                delivering.append(v)
+        # match them to distinct delivered packages left at their points:
+        match = {} # package -> vehicle
+        def assign(v, tried):
+            for j in range(self.n):
+                if packed[m + j] == DELIVERED and j not in tried and\
+                        self.destination(j) == packed[v]:
+                    tried.add(j)
+                    if j not in match or assign(match[j], tried):
+                        match[j] = v
+                        return True
+            return False
+        return all(assign(v, set()) for v in delivering)
+
+
+    def canonicalKey(self, positions, statuses):
+        """
+        Sort the vehicles by position and then by the packages they carry,
+        renaming the carriers in the package statuses to match.
+        :param positions: point index of each vehicle.
+        :param statuses: WAITING, DELIVERED or carrier of each package.
+        :return: canonical key, see canonical.
+        """
+        if self.m == 1:
+            return tuple(positions) + tuple(statuses)
+        loads = [[] for v in range(self.m)]
+        for j in range(self.n):
+            if statuses[j] >= 0:
+                loads[statuses[j]].append(j)
+        order = sorted(range(self.m), key=lambda v: (positions[v], loads[v]))
+        rename = [0] * self.m
+        for i in range(self.m):
+            rename[order[i]] = i
+        return tuple([positions[v] for v in order] +
+                        [rename[s] if s >= 0 else s for s in statuses])
+
+    def vehicleLocation(self, state, v):
+        """ Return the point index of vehicle v in the given state """
+        return self.pointIndex[state.getVehicles()[v].getPosition()]
+
+    def isDelivered(self, state, j):
+        """ Return whether package j is delivered in the given state """
+        return j not in state.getPackages()
+
+    def carrier(self, state, j):
+        """ Return the vehicle carrying package j, None if it is waiting """
+        return state.getPackages()[j].carrier()
+
     def __str__(self):
         """  String representation of Problem """
         return "(M, N, K, Y) := " + str((self.m, self.n, self.k, self.y)) +\
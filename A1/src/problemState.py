@@ -13,10 +13,26 @@ from unique import UniqueHashable
     * - all authors equally contributed to the implementation
 """
 
+# Seed of the Zobrist keys. Fixed, so that equal states hash alike in every
+# problem and runs are reproducible:
+ZOBRIST_SEED = 317
+KEY_MASK = (1 << 64) - 1
+
+def zobristKey(*content):
+    """
+        Zobrist key of a vehicle or package, drawn from its contents by a
+        splitmix64 finalizer so that the keys of similar contents share no
+        bits. A State hashes to the XOR of the keys of its vehicles and
+        packages, however it was built.
+        :return: 63 bit key.
+    """
+    x = (hash(content) ^ ZOBRIST_SEED) & KEY_MASK
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & KEY_MASK
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & KEY_MASK
+    return (x ^ (x >> 31)) >> 1
+
 class Vehicle(UniqueHashable):
-    index = None
-    position = None
-    room = None
+    __slots__ = ("index", "position", "room")
 
     def __init__(self, pos, i, r):
         """
@@ -32,6 +48,16 @@ class Vehicle(UniqueHashable):
     def __hash__(self):
         return hash((self.position,self.index,self.room))
 
+    def __eq__(self, other):
+        # instances are interned, so equal ones are usually the same one:
+        return self is other or (type(other) is Vehicle and
+            self.index == other.index and self.room == other.room and
+            self.position == other.position)
+
+    def zobristKey(self):
+        """ Zobrist key of the vehicle, see State.__hash__ """
+        return zobristKey(0, self.index, self.position, self.room)
+
     def getRoom(self):
         """
             Return leftover room for packages.
@@ -62,10 +88,7 @@ class Vehicle(UniqueHashable):
                 "Room: " + str(self.room) + "\n"
 
 class Package(UniqueHashable):
-    position = None
-    destination = None
-    carried = None
-    index = None
+    __slots__ = ("position", "destination", "carried", "index")
 
     def __init__(self,pos,dest,i,c):
         """
@@ -84,6 +107,17 @@ class Package(UniqueHashable):
         return hash((self.position,self.destination,\
                         self.index,self.carried))
 
+    def __eq__(self, other):
+        return self is other or (type(other) is Package and
+            self.index == other.index and self.carried == other.carried and
+            self.position == other.position and
+            self.destination == other.destination)
+
+    def zobristKey(self):
+        """ Zobrist key of the package, -1 is the carrier while waiting """
+        return zobristKey(1, self.index,
+                            -1 if self.carried is None else self.carried)
+
     def getIndex(self):
         """ Get index of the package """
         return self.index
@@ -106,9 +140,17 @@ class Package(UniqueHashable):
         "\n" + "Destination: " + str(self.destination) +\
         "\nCarried: " + str(self.carried)
 
-class State(UniqueHashable):
-    vehicles = None
-    packages = None
+class State():
+    """
+        Not a UniqueHashable: every successor is built from freshly cloned
+        dictionaries, which never match an interned key, so interning States
+        only grew the table. States are equal when their vehicles and
+        packages are, not merely their hashes. The hash is the XOR of the
+        Zobrist keys of the vehicles and packages, computed once, or set by
+        the Problem that builds the state from the same keys, see
+        Problem.stateHash.
+    """
+    __slots__ = ("vehicles", "packages", "hashValue")
 
     def __init__(self, v, p):
         """
@@ -118,12 +160,25 @@ class State(UniqueHashable):
         """
         self.vehicles = v
         self.packages = p
+        self.hashValue = None
 
     def __hash__(self):
-        return hash((self.vehicles,self.packages))
+        if self.hashValue is None:
+            h = 0
+            for v, vehicle in self.vehicles.items():
+                h ^= vehicle.zobristKey()
+            for j, package in self.packages.items():
+                h ^= package.zobristKey()
+            self.hashValue = h
+        return self.hashValue
 
     def __eq__(self, other):
-        return hash(self) == hash(other)
+        if self is other:
+            return True
+        if not isinstance(other, State):
+            return False
+        return self.vehicles == other.vehicles and\
+                self.packages == other.packages
 
     def getPackages(self):
         """
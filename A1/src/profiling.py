@@ -0,0 +1,197 @@
+import time
+
+"""
+    Profiling hooks for the searches of the MNKY problem. A Profile passed
+    to Search.bfs, Search.dfs or Search.astar breaks the run time of the
+    search down into phases and counts the nodes it expands, generates and
+    finds again. The search only wraps its problem, frontier and closed set
+    when it is given a Profile, so the hot loop is unchanged without one.
+
+    Phases:
+        successors  generating moves, successor states and search nodes;
+        heuristic   evaluating and updating the heuristic;
+        frontier    queue, stack and heap operations;
+        closed      closed set lookups and updates;
+        hashing     hashing the keys of closed set lookups, timed on its own
+                    before each lookup.
+
+    Authors: Mahmud Ahzam*, Tayab Soomro*, Flaviu Vadan*
+    Class: CMPT317
+    Instructor: Michael Horsch
+    Assignment: 1
+
+    * - all authors equally contributed to the implementation
+"""
+
+PHASES = ["successors", "heuristic", "frontier", "closed", "hashing"]
+
+# Problem methods timed by a Profile, and their phases:
+PROBLEM_PHASES = {"moves": "successors", "childState": "successors",
+                  "materialize": "successors", "successors": "successors"}
+
+class Profile():
+    """
+        Time spent in each phase of a search, in nanoseconds, and node
+        counters: expanded nodes, generated search nodes and duplicates,
+        closed set or frontier lookups that found their state already
+        there.
+    """
+    phases = None
+    calls = None
+    expanded = 0
+    generated = 0
+    duplicates = 0
+
+    def __init__(self):
+        self.phases = {phase: 0 for phase in PHASES}
+        self.calls = {phase: 0 for phase in PHASES}
+
+    def timed(self, phase, function):
+        """
+            Return a version of function that adds its run time to phase.
+        """
+        phases = self.phases
+        calls = self.calls
+        clock = time.perf_counter_ns
+        def run(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                phases[phase] += clock() - start
+                calls[phase] += 1
+        return run
+
+    def problem(self, problem):
+        """
+            Wrap a problem so that its PROBLEM_PHASES methods are
+            timed and the expanded and generated nodes are counted. The
+            problem itself is not changed.
+        """
+        return ProfiledProblem(problem, self)
+
+    def frontier(self, frontier, methods):
+        """
+            Time the given methods of a queue, stack or heap and count its
+            lookups that find a queued state as duplicates.
+            :param frontier: data structure created by the search.
+            :param methods: names of the methods to time.
+            :return: the same data structure.
+        """
+        for name in methods:
+            setattr(frontier, name, self.timed("frontier",
+                                                getattr(frontier, name)))
+        if "queuedCost" in methods:
+            queuedCost = frontier.queuedCost
+            def lookup(key):
+                cost = queuedCost(key)
+                if cost is not None:
+                    self.duplicates += 1
+                return cost
+            frontier.queuedCost = lookup
+        return frontier
+
+    def closedSet(self):
+        """ Return an empty closed set that times its lookups """
+        return ProfiledDict(self)
+
+    def estimate(self, estimate):
+        """ Time a function computing heuristic values of nodes """
+        return self.timed("heuristic", estimate)
+
+    def total(self):
+        """ Return the nanoseconds spent in all the phases """
+        return sum(self.phases.values())
+
+    def report(self):
+        """
+            Return the report lines: a line per phase with its milliseconds
+            and calls, then the node counters.
+        """
+        lines = []
+        for phase in PHASES:
+            lines.append(phase + ": " + str(round(self.phases[phase] / 1e6,
+                            3)) + " ms in " + str(self.calls[phase]) +\
+                            " calls")
+        lines.append("expanded: " + str(self.expanded) + "; generated: " +\
+                        str(self.generated) + "; duplicates: " +\
+                        str(self.duplicates))
+        return lines
+
+class ProfiledProblem():
+    """
+        Stand-in for a problem that times its PROBLEM_PHASES methods and
+        counts the expanded and generated nodes.
+    """
+
+    def __init__(self, problem, profile):
+        self.problem = problem
+        self.profile = profile
+
+    def __getattr__(self, name):
+        attr = getattr(self.problem, name)
+        if name not in PROBLEM_PHASES:
+            return attr
+        timed = self.profile.timed(PROBLEM_PHASES[name], attr)
+        profile = self.profile
+        if name == "moves":
+            def counted(node):
+                profile.expanded += 1
+                return timed(node)
+        elif name == "successors":
+            def counted(node):
+                profile.expanded += 1
+                successors = timed(node)
+                profile.generated += len(successors)
+                return successors
+        elif name == "materialize":
+            def counted(*args):
+                profile.generated += 1
+                return timed(*args)
+        else:
+            counted = timed
+        # look the method up once:
+        setattr(self, name, counted)
+        return counted
+
+class ProfiledDict(dict):
+    """
+        Closed set that times its lookups and updates, hashing the key on
+        its own first, and counts the lookups that find their key.
+    """
+
+    def __init__(self, profile):
+        dict.__init__(self)
+        self.profile = profile
+
+    def hashKey(self, key):
+        start = time.perf_counter_ns()
+        hash(key)
+        self.profile.phases["hashing"] += time.perf_counter_ns() - start
+        self.profile.calls["hashing"] += 1
+
+    def __contains__(self, key):
+        self.hashKey(key)
+        start = time.perf_counter_ns()
+        found = dict.__contains__(self, key)
+        self.profile.phases["closed"] += time.perf_counter_ns() - start
+        self.profile.calls["closed"] += 1
+        if found:
+            self.profile.duplicates += 1
+        return found
+
+    def __getitem__(self, key):
+        self.hashKey(key)
+        start = time.perf_counter_ns()
+        try:
+            return dict.__getitem__(self, key)
+        finally:
+            self.profile.phases["closed"] += time.perf_counter_ns() - start
+            self.profile.calls["closed"] += 1
+
+    def __setitem__(self, key, value):
+        self.hashKey(key)
+        start = time.perf_counter_ns()
+        dict.__setitem__(self, key, value)
+        self.profile.phases["closed"] += time.perf_counter_ns() - start
+        self.profile.calls["closed"] += 1
@@ -88,11 +88,11 @@ def generateAStarPlotWithLines(n):
 
     for i in range(int(n)):
         p = generateRandomProblem()
-        H0_Y.append(sum(S.astar(p, h0)[1:]))
-        H1_Y.append(sum(S.astar(p, h1)[1:]))
-        H2_Y.append(sum(S.astar(p, h2)[1:]))
-        H3_Y.append(sum(S.astar(p, h3)[1:]))
-        H4_Y.append(sum(S.astar(p, h4)[1:]))
+        H0_Y.append(sum(S.astar(p, h0)[1:6]))
+        H1_Y.append(sum(S.astar(p, h1)[1:6]))
+        H2_Y.append(sum(S.astar(p, h2)[1:6]))
+        H3_Y.append(sum(S.astar(p, h3)[1:6]))
+        H4_Y.append(sum(S.astar(p, h4)[1:6]))
 
     plt.plot([x for x in range(1,n+1)], H0_Y, marker='o', linestyle='-', color='r')
     plt.plot([x for x in range(1,n+1)], H1_Y, marker='o', linestyle='-', color='g')
@@ -120,7 +120,7 @@ def generateAStarPlot(n):
     X = []
     for i in range(int(n)):
         p = generateRandomProblem()
-        results = [S.astar(p, h)[1:] for h in heuristics]
+        results = [S.astar(p, h)[1:6] for h in heuristics]
         H_Y = []
         for j in range(len(results)):
             y = sum(results[j])
@@ -1,12 +1,18 @@
-from dataStructures import StateStack, StateQueue, StateHeap
+from dataStructures import StateStack, StateQueue, StateHeap, LRUCache
 from problem import Problem
+from packedProblem import PackedProblem
 import problem
 from costUtils import *
-import time, math, sys
+from searchNode import planStep
+from profiling import Profile
+from timing import Timer, seconds
+import math, sys
 
 """
     Search class that implements the search algorithms used in the MNKY problem.
-    The class defined BFS, DFS, and A* search.
+    The class defined BFS, DFS, and A* search, the iterative deepening
+    searches IDDFS and IDA*, a bidirectional BFS, and the memory-bounded
+    beam search and SMA*.
 
     Authors: Mahmud Ahzam*, Tayab Soomro*, Flaviu Vadan*
     Class: CMPT317
@@ -16,49 +22,161 @@ import time, math, sys
     * - all authors equally contributed to the implementation
 """
 
+# Heuristic values A* remembers by default, see Search.astar:
+MEMO_SIZE = 100000
+
+# Default number of nodes beam search keeps per depth, see Search.beam:
+BEAM_WIDTH = 100
+
+# Default number of nodes SMA* may hold in its tree, see Search.smastar:
+SMA_BUDGET = 10000
+
 class Search():
     """
         Class deals with the search functionality.
     """
 
-    def bfs(problem):
+    def bfs(problem, profile=None):
         """
-            Search algorithm
+            Search algorithm. Graph search: states are only queued the first
+            time they are generated, and generated states are checked for the
+            goal right away instead of when they are dequeued.
             :param initialState: the initial state that is passed to the
                                     algorithm.
+            :param profile: profiling.Profile to record the time spent in
+                            each phase of the search in, None for none.
             :return:
+                list containing following items:
+                - Trace, expanded_nodes, depth, clock time, memory and cost
 
         """
         # monitor performance stats
         exp_nodes = 0 # number of nodes expanded
-        start_time = time.time() # Time we started the search.
+        timer = Timer() # Times the search from here.
         depth = 0 # the depth of our solution.
         memory = 0 # the max width of the queue for the entire problem run
 
+        root = problem.getInitState()
+        if problem.isGoal(root.getState()):
+            return [(root.getState(), root.code)], exp_nodes, depth, timer.wallMs(), memory, root.getCost()
+
+        seen = {}
         q = StateQueue()
-        q.enqueue(problem.getInitState())
+        if profile is not None:
+            problem = profile.problem(problem)
+            seen = profile.closedSet()
+            q = profile.frontier(q, ["enqueue", "dequeue"])
+        seen[root.getState()] = True
+        q.enqueue(root)
         while q.isEmpty() is False:
             curr = q.dequeue()
             # number of expanded nodes increases every time we dequeue
             exp_nodes += 1
-            if problem.isGoal(curr.getState()):
-                trace, depth = curr.traceBack()
-                elapsed_time = time.time() - start_time
-                return trace, exp_nodes, depth, round(elapsed_time*1000,2), memory, curr.getCost()
-            else:
-                succ = problem.successors(curr)
-                for successor in succ:
-                    q.enqueue(successor)
-                # adjust memory used if memory use larger than previous record
-                if memory < q.getNumEl():
-                    memory = q.getNumEl()
+            # only the moves to unseen states become search nodes:
+            moves = problem.moves(curr)
+            vehicles, packages, targets, costs = moves
+            for i in range(len(vehicles)):
+                state = problem.childState(curr, vehicles[i], packages[i],
+                                            targets[i])
+                if state in seen:
+                    continue
+                successor = problem.materialize(curr, moves, i, state)
+                if problem.isGoal(state):
+                    trace, depth = successor.traceBack()
+                    return trace, exp_nodes, depth, timer.wallMs(), memory, successor.getCost()
+                seen[state] = True
+                q.enqueue(successor)
+            # adjust memory used if memory use larger than previous record
+            if memory < q.getNumEl():
+                memory = q.getNumEl()
         return []
 
-    def dfs(problem):
+    def bidirectional(problem):
+        """
+            Bidirectional breadth first search. Searches forward from the
+            initial state and backward from the goal state over packed
+            states, a whole depth at a time on the side with the smaller
+            frontier, and stops at the depth where the two sides meet. Like
+            BFS it finds a plan with the fewest moves. It expands fewer
+            nodes than BFS but keeps more of them: on the test cases it
+            expands 50 to 90% as many nodes (2942 against 4482 on 2522),
+            while both frontiers together peak at 1.6 to 2.1 times BFS's
+            (2290 against 1108 on 2522), so it saves time, not memory.
+            :param problem: problem which contains initialState.
+            :return:
+                list containing following items:
+                - Trace, expanded_nodes, depth, clock time, memory and cost
+        """
+        exp_nodes = 0 # number of nodes expanded on both sides
+        timer = Timer() # Times the search from here.
+        memory = 0 # the max width of both frontiers together
+
+        root = problem.getInitState()
+        goal = problem.packedGoal()
+        forward = {problem.pack(root.getState()): root} # packed -> node
+        backward = {goal: None} # packed -> next packed state to the goal
+        forwardLayer = [root]
+        backwardLayer = [goal]
+        meeting = None
+        if goal in forward:
+            meeting = goal
+        while meeting is None and len(forwardLayer) > 0 and\
+                len(backwardLayer) > 0:
+            if len(forwardLayer) <= len(backwardLayer):
+                layer = []
+                for curr in forwardLayer:
+                    exp_nodes += 1
+                    for successor in problem.successors(curr):
+                        packed = problem.pack(successor.getState())
+                        if packed in forward:
+                            continue
+                        forward[packed] = successor
+                        layer.append(successor)
+                        if packed in backward and (meeting is None or
+                                depthToGoal(backward, packed) <
+                                depthToGoal(backward, meeting)):
+                            meeting = packed
+                forwardLayer = layer
+            else:
+                layer = []
+                for packed in backwardLayer:
+                    exp_nodes += 1
+                    for pred in problem.predecessors(packed):
+                        if pred in backward:
+                            continue
+                        backward[pred] = packed
+                        layer.append(pred)
+                        if pred in forward and (meeting is None or
+                                forward[pred].depth < forward[meeting].depth):
+                            meeting = pred
+                backwardLayer = layer
+            if len(forwardLayer) + len(backwardLayer) > memory:
+                memory = len(forwardLayer) + len(backwardLayer)
+        if meeting is None:
+            return []
+
+        # replay the backward half forward to get the nodes and the costs:
+        node = forward[meeting]
+        packed = backward[meeting]
+        while packed is not None:
+            for successor in problem.successors(node):
+                if problem.pack(successor.getState()) == packed:
+                    node = successor
+                    break
+            packed = backward[packed]
+        trace, depth = node.traceBack()
+        return trace, exp_nodes, depth, timer.wallMs(), memory, node.getCost()
+
+    def dfs(problem, depthLimit=None, profile=None):
         """
-            Search algorithm
+            Search algorithm. Graph search: a state is expanded again only
+            when it is reached at a smaller depth than before, which matters
+            when a depth limit is given.
             :param initialState: the initial state that is passed to the
                                     algorithm.
+            :param depthLimit: nodes at this depth are not expanded, None
+                                for no limit.
+            :param profile: see bfs.
             :return:
                 list containing following items:
                 - Trace, expanded_nodes, depth, clock time, memory and cost
@@ -66,113 +184,937 @@ class Search():
 
         # monitor performance stats
         exp_nodes = 0 # number of nodes expanded
-        start_time = time.time() # Time we started the search.
+        timer = Timer() # Times the search from here.
         depth = 0 # the depth of our solution.
         memory = 0 # the max height of the stack for the entire problem
 
+        seen = {} # depth at which each state was expanded
         s = StateStack()
+        if profile is not None:
+            problem = profile.problem(problem)
+            seen = profile.closedSet()
+            s = profile.frontier(s, ["push", "pop"])
         s.push(problem.getInitState())
         while s.isEmpty() is False:
             curr = s.pop()
+            if curr.getState() in seen and seen[curr.getState()] <= curr.depth:
+                continue
+            seen[curr.getState()] = curr.depth
             # number of expanded nodes increases every time we pop
             exp_nodes += 1
             if problem.isGoal(curr.getState()):
                 trace, depth = curr.traceBack()
-                elapsed_time = time.time() - start_time
-                return trace, exp_nodes, depth, round(elapsed_time*1000,2), memory, curr.getCost()
-            else:
-                succ = problem.successors(curr)
-                memory += len(succ)
-                for successor in succ:
-                    s.push(successor)
-                # adjust memory used if memory use larger than previous record
-                if memory < s.getNumEl():
-                    memory = s.getNumEl()
+                return trace, exp_nodes, depth, timer.wallMs(), memory, curr.getCost()
+            if depthLimit is not None and curr.depth >= depthLimit:
+                continue
+            for successor in problem.successors(curr):
+                if successor.getState() in seen and\
+                        seen[successor.getState()] <= successor.depth:
+                    continue
+                s.push(successor)
+            # adjust memory used if memory use larger than previous record
+            if memory < s.getNumEl():
+                memory = s.getNumEl()
+        return []
+
+    def iddfs(problem, maxDepth=None):
+        """
+            Iterative deepening depth first search. Runs depth limited
+            searches with a cycle check on the current path only, so memory
+            stays linear in the depth.
+            :param problem: problem which contains initialState
+            :param maxDepth: largest depth limit to try, None for no limit.
+            :return:
+                list containing following items:
+                - Trace, expanded_nodes, depth, clock time, memory and cost
+        """
+        exp_nodes = 0 # number of nodes expanded over all iterations
+        timer = Timer() # Times the search from here.
+        memory = 0 # the max number of nodes held by any iteration
+
+        limit = 0
+        while maxDepth is None or limit <= maxDepth:
+            goal, nodes, held, h_evals, h_updates, cutoff, nextBound = \
+                boundedDepthFirst(problem, depthLimit=limit)
+            exp_nodes += nodes
+            memory = max(memory, held)
+            if goal is not None:
+                trace, depth = goal.traceBack()
+                return trace, exp_nodes, depth, timer.wallMs(), memory, goal.getCost()
+            if not cutoff:
+                # the whole space fits within the limit
+                break
+            limit += 1
         return []
 
-    def astar(problem, h):
+    def idastar(problem, h):
+        """
+            Iterative deepening A*. Runs depth first searches bounded by
+            f = g + h, raising the bound to the smallest f that went over it,
+            with memory linear in the depth.
+            :param: problem which contains initialState
+            :param: heuristic function to use.
+            :return:
+                list containing following items:
+                - Trace, expanded_nodes, depth, clock time, memory, cost and
+                  a dictionary of counters (heuristic_evaluations,
+                  heuristic_updates, iterations)
+        """
+        exp_nodes = 0 # number of nodes expanded over all iterations
+        timer = Timer() # Times the search from here.
+        memory = 0 # the max number of nodes held by any iteration
+        h_evals = 0 # number of times the heuristic was computed
+        h_updates = 0 # number of times it was updated from the parent's
+        iterations = 0
+
+        inc = problem.incrementalHeuristic(h)
+        h = problem.heuristic(h)
+        bound = h(problem.getInitState().getState())
+        while bound is not None:
+            iterations += 1
+            goal, nodes, held, evals, updates, cutoff, bound = \
+                boundedDepthFirst(problem, costBound=bound, h=h, inc=inc)
+            exp_nodes += nodes
+            h_evals += evals
+            h_updates += updates
+            memory = max(memory, held)
+            if goal is not None:
+                trace, depth = goal.traceBack()
+                counters = {"heuristic_evaluations": h_evals,
+                            "heuristic_updates": h_updates,
+                            "iterations": iterations}
+                return trace, exp_nodes, depth, timer.wallMs(), memory, goal.getCost(), counters
+        # Search failed:
+        return [],-1,-1,-1,-1,-1,{"heuristic_evaluations": h_evals,
+                                  "heuristic_updates": h_updates,
+                                  "iterations": iterations}
+
+    def astar(problem, h, symmetry=False, memoSize=MEMO_SIZE, weight=1,
+                profile=None):
         """
             Covers uniform cost search if h == lambda a: 0
             :param: problem which contains initialState
             :param: heuristic funciton to use.
+            :param weight: weighted A* expands by f = g + weight * h, which
+                           finds a plan faster for weights above 1 but may
+                           cost up to weight times more.
+            :param symmetry: whether states that only differ by a
+                             permutation of the vehicles count as one state
+                             in the seen set and the queue.
+            :param memoSize: the most heuristic values remembered by state,
+                             0 for none. Heuristics that also depend on the
+                             distances driven are never remembered.
+            :param profile: see bfs.
+            :return:
+                list containing following items:
+                - Trace, expanded_nodes, depth, clock time, memory, cost and
+                  a dictionary of counters (heuristic_evaluations,
+                  heuristic_updates, memo_hits, memo_misses,
+                  intern_pool_size, intern_hit_rate)
         """
         # monitor performance stats
         exp_nodes = 0 # number of nodes expanded
-        start_time = time.time() # Time we started the search.
+        timer = Timer() # Times the search from here.
         depth = 0 # the depth of our solution.
         memory = 0 # the max memory in use i.e. size of data structure
+        h_evals = 0 # number of times the heuristic was computed
+        h_updates = 0 # number of times it was updated from the parent's
 
+        # use the version of h that understands the problem's states:
+        inc = problem.incrementalHeuristic(h)
+        h = problem.heuristic(h)
+        memo = None
+        if memoSize > 0 and (inc is None or inc.stateOnly):
+            memo = LRUCache(memoSize)
+        # states are identified by themselves or by their canonical key:
+        canonical = problem.canonical if symmetry else None
         seen = {}
-        q = StateHeap(lambda a,b: a.getCost() + h(a.getState()) == \
-                                  b.getCost() + h(b.getState()),   \
-                      lambda a,b: a.getCost() + h(a.getState()) <  \
-                                  b.getCost() + h(b.getState()))
+        q = StateHeap(lambda a,b: a.getF() == b.getF(),
+                      lambda a,b: a.getF() < b.getF())
+        evaluate = estimate
+        if profile is not None:
+            problem = profile.problem(problem)
+            seen = profile.closedSet()
+            q = profile.frontier(q, ["enqueue", "dequeue", "queuedCost"])
+            evaluate = profile.estimate(estimate)
 
-        q.enqueue(problem.getInitState())
+        root = problem.getInitState()
+        evaluate(root, h, inc, weight)
+        h_evals += 1
+        q.enqueue(root, None if canonical is None else\
+                            canonical(root.getState()))
 
         while q.isEmpty() is False:
             curr = q.dequeue()
             exp_nodes += 1
-            # This reduces hash conflicts but increases time:
-            # seen[(curr.getState(), curr.getPlanStep())] = True
-            seen[curr.getState()] = True
+            # States are compared exactly, equal hashes do not merge them:
+            if canonical is None:
+                seen[curr.getState()] = True
+            else:
+                seen[canonical(curr.getState())] = True
             if problem.isGoal(curr.getState()):
-                elapsed_time = time.time() - start_time
                 trace, depth = curr.traceBack()
-                return trace, exp_nodes, depth, round(elapsed_time*1000,2), memory, curr.getCost()
-            successors = problem.successors(curr)
-            for s in successors:
-                if s.getState() in seen:
+                counters = {"heuristic_evaluations": h_evals,
+                            "heuristic_updates": h_updates,
+                            "memo_hits": 0 if memo is None else memo.hits,
+                            "memo_misses": 0 if memo is None else memo.misses,
+                            "intern_pool_size": len(problem.pool),
+                            "intern_hit_rate": problem.pool.hitRate()}
+                return trace, exp_nodes, depth, timer.wallMs(), memory, curr.getCost(), counters
+            # Moves come with their costs, so a search node is only built
+            # for states that are new or cheaper than the queued copy:
+            moves = problem.moves(curr)
+            vehicles, packages, targets, costs = moves
+            for i in range(len(vehicles)):
+                state = problem.childState(curr, vehicles[i], packages[i],
+                                            targets[i])
+                key = state if canonical is None else canonical(state)
+                if key in seen:
+                    continue
+                queued = q.queuedCost(key)
+                if queued is not None and queued <= costs[i]:
                     continue
+                s = problem.materialize(curr, moves, i, state)
+                known = None if memo is None else memo.get(state)
+                if known is not None:
+                    s.setHeuristic(known[0], known[1], weight)
                 else:
-                    q.enqueue(s) # Handles cost modification as well
+                    if evaluate(s, h, inc, weight):
+                        h_updates += 1
+                    else:
+                        h_evals += 1
+                    if memo is not None:
+                        memo.put(state, (s.getHeuristic(), s.hAux))
+                q.enqueue(s, key) # Handles cost modification as well
+            if len(q) > memory:
+                memory = len(q)
+        # Search failed:
+        return [],-1,-1,-1,-1,-1,{"heuristic_evaluations": h_evals,
+                                  "heuristic_updates": h_updates,
+                                  "memo_hits": 0 if memo is None else memo.hits,
+                                  "memo_misses": 0 if memo is None else memo.misses,
+                                  "intern_pool_size": len(problem.pool),
+                                  "intern_hit_rate": problem.pool.hitRate()}
+
+    def beam(problem, h, width=BEAM_WIDTH):
+        """
+            Beam search. Expands the search a depth at a time like BFS, but
+            only the width nodes with the smallest f = g + h at each depth
+            are kept, the others are pruned. Nodes that cannot beat the
+            cheapest plan found so far are dropped, and the search runs
+            until no node is left. The plan found may not be the cheapest.
+            :param: problem which contains initialState
+            :param: heuristic function to use.
+            :param width: the most nodes kept at each depth.
+            :return:
+                list containing following items:
+                - Trace, expanded_nodes, depth, clock time, memory, cost and
+                  a dictionary of counters (heuristic_evaluations,
+                  heuristic_updates, pruned)
+        """
+        exp_nodes = 0 # number of nodes expanded
+        timer = Timer() # Times the search from here.
+        memory = 0 # the max number of nodes generated at one depth
+        h_evals = 0 # number of times the heuristic was computed
+        h_updates = 0 # number of times it was updated from the parent's
+        pruned = 0 # number of nodes left out of the beam
+
+        inc = problem.incrementalHeuristic(h)
+        h = problem.heuristic(h)
+        seen = {} # cheapest cost each state was expanded at
+        incumbent = None # cheapest goal node
+
+        root = problem.getInitState()
+        estimate(root, h, inc)
+        h_evals += 1
+        layer = [root]
+        while len(layer) > 0:
+            q = StateHeap(lambda a,b: a.getF() == b.getF(),
+                          lambda a,b: a.getF() < b.getF())
+            for curr in layer:
+                if problem.isGoal(curr.getState()):
+                    if incumbent is None or\
+                            curr.getCost() < incumbent.getCost():
+                        incumbent = curr
+                    continue
+                exp_nodes += 1
+                seen[curr.getState()] = curr.getCost()
+                moves = problem.moves(curr)
+                vehicles, packages, targets, costs = moves
+                for i in range(len(vehicles)):
+                    if incumbent is not None and\
+                            costs[i] >= incumbent.getCost():
+                        continue
+                    state = problem.childState(curr, vehicles[i],
+                                                packages[i], targets[i])
+                    if state in seen and seen[state] <= costs[i]:
+                        continue
+                    queued = q.queuedCost(state)
+                    if queued is not None and queued <= costs[i]:
+                        continue
+                    s = problem.materialize(curr, moves, i, state)
+                    if estimate(s, h, inc):
+                        h_updates += 1
+                    else:
+                        h_evals += 1
+                    if incumbent is None or s.getF() < incumbent.getCost():
+                        q.enqueue(s)
             if len(q) > memory:
                 memory = len(q)
+            layer = []
+            while len(layer) < width and q.isEmpty() is False:
+                layer.append(q.dequeue())
+            pruned += len(q)
+        counters = {"heuristic_evaluations": h_evals,
+                    "heuristic_updates": h_updates,
+                    "pruned": pruned}
+        if incumbent is None:
+            # Search failed:
+            return [],-1,-1,-1,-1,-1,counters
+        trace, depth = incumbent.traceBack()
+        return trace, exp_nodes, depth, timer.wallMs(), memory, incumbent.getCost(), counters
+
+    def smastar(problem, h, budget=SMA_BUDGET):
+        """
+            Simplified memory-bounded A*. Runs A* on a search tree of at
+            most budget nodes, the queued leaves and the expanded nodes
+            with successors still in the tree. When the tree outgrows the
+            budget, the leaf with the largest f (the shallowest of those)
+            is forgotten and its f is backed up into its parent, which is
+            queued again right away with the smallest f of its forgotten
+            successors. Expanding it again generates only the forgotten
+            successors with that f, each starting from the f it backed up,
+            and keeps it queued for the others. Successors never have a
+            smaller f than their parent (pathmax). Expanded states are
+            remembered in an LRUCache of the same size, and states expanded
+            in the tree are never generated again at a cost as high.
+            With a budget close to what the plan needs, SMA* keeps forgetting
+            and generating the same nodes again: on 2412 with h1, A* expands
+            332 nodes, SMA* 588 at a budget of 200, 8450 at 100 and 66063
+            (about 10 seconds) at 50.
+            :param: problem which contains initialState
+            :param: heuristic function to use.
+            :param budget: the most nodes in the search tree at a time.
+            :return:
+                list containing following items:
+                - Trace, expanded_nodes, depth, clock time, memory, cost and
+                  a dictionary of counters (heuristic_evaluations,
+                  heuristic_updates, forgotten)
+        """
+        exp_nodes = 0 # number of nodes expanded
+        timer = Timer() # Times the search from here.
+        memory = 0 # the max number of nodes in the search tree
+        h_evals = 0 # number of times the heuristic was computed
+        h_updates = 0 # number of times it was updated from the parent's
+        forgotten = 0 # number of leaves dropped from the tree
+
+        inc = problem.incrementalHeuristic(h)
+        h = problem.heuristic(h)
+        closed = LRUCache(budget) # state -> cost it was expanded at
+        # expanded nodes in the tree, by id -> [node, successors in the
+        # tree, state -> f backed up by each forgotten successor]:
+        interior = {}
+        # the cheapest expanded node in the tree for each state, which the
+        # LRUCache may have forgotten:
+        tree = {}
+        # best first, the deepest of equal f:
+        q = StateHeap(lambda a,b: a.getF() == b.getF(),
+                      lambda a,b: a.getF() < b.getF() or\
+                        (a.getF() == b.getF() and a.depth > b.depth))
+        # the same leaves, worst first, the shallowest of equal f:
+        worst = StateHeap(lambda a,b: a.getF() == b.getF(),
+                          lambda a,b: a.getF() > b.getF() or\
+                            (a.getF() == b.getF() and a.depth < b.depth))
+
+        def isQueued(node):
+            """ Tell whether node itself, not another copy, is queued """
+            key = node.getState()
+            return key in q.lookup and q.lookup[key].item is node
+
+        def unqueue(state):
+            """ Take the node queued for state off the queue """
+            node = q.remove(state)
+            if id(node) not in interior:
+                # a leaf, it leaves the tree:
+                worst.remove(state)
+                if node.pred is not None:
+                    release(node.pred)
+            return node
+
+        def leave(node):
+            """ Take an expanded node out of the tree """
+            del interior[id(node)]
+            if tree.get(node.getState()) is node:
+                del tree[node.getState()]
+
+        def release(node):
+            """ Take one successor of node out of the tree """
+            entry = interior.get(id(node))
+            if entry is None:
+                # already out of the tree
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            leave(node)
+            if isQueued(node):
+                # a leaf again, queued for its forgotten successors:
+                worst.enqueue(node)
+            elif node.pred is not None:
+                # every successor was a dead end:
+                release(node.pred)
+
+        def forget():
+            """ Drop the worst leaf from the tree """
+            node = worst.dequeue()
+            q.remove(node.getState())
+            closed.pop(node.getState())
+            parent = node.pred
+            if parent is None:
+                return
+            entry = interior.get(id(parent))
+            if entry is None:
+                return
+            # the f it backed up is where it starts when generated again:
+            entry[2][node.getState()] = node.getF()
+            # the parent is queued again right away, with the smallest f of
+            # its forgotten successors, so that they are generated again as
+            # soon as they look best:
+            state = parent.getState()
+            if isQueued(parent):
+                q.remove(state)
+            elif q.queuedCost(state) is not None:
+                if q.queuedCost(state) <= parent.getCost():
+                    # a copy as cheap covers the forgotten successors:
+                    release(parent)
+                    return
+                unqueue(state)
+            parent.setHeuristic(parent.getHeuristic(), parent.hAux)
+            parent.backUp(min(entry[2].values()))
+            q.enqueue(parent)
+            release(parent)
+
+        root = problem.getInitState()
+        estimate(root, h, inc)
+        h_evals += 1
+        q.enqueue(root)
+        worst.enqueue(root)
+
+        while q.isEmpty() is False:
+            curr = q.dequeue()
+            if id(curr) not in interior:
+                worst.remove(curr.getState())
+            exp_nodes += 1
+            if problem.isGoal(curr.getState()):
+                trace, depth = curr.traceBack()
+                counters = {"heuristic_evaluations": h_evals,
+                            "heuristic_updates": h_updates,
+                            "forgotten": forgotten}
+                return trace, exp_nodes, depth, timer.wallMs(), memory, curr.getCost(), counters
+            closed.put(curr.getState(), curr.getCost())
+            # a node queued again keeps its successors still in the tree,
+            # the forgotten ones are generated again:
+            # only those with the backed up f, the rest keep it queued:
+            requeued = id(curr) in interior
+            bound = curr.getF()
+            entry = interior.setdefault(id(curr), [curr, 0, {}])
+            backedUp = entry[2]
+            entry[2] = {}
+            if curr.getState() not in tree or\
+                    curr.getCost() < tree[curr.getState()].getCost():
+                tree[curr.getState()] = curr
+            # held while it is expanded, so that releasing the queued
+            # copies its successors replace does not take it out:
+            entry[1] += 1
+            moves = problem.moves(curr)
+            vehicles, packages, targets, costs = moves
+            for i in range(len(vehicles)):
+                state = problem.childState(curr, vehicles[i], packages[i],
+                                            targets[i])
+                expanded = closed.get(state)
+                if expanded is not None and expanded <= costs[i]:
+                    continue
+                if state in tree and tree[state].getCost() <= costs[i]:
+                    continue
+                queued = q.queuedCost(state)
+                if queued is not None and queued <= costs[i]:
+                    continue
+                s = problem.materialize(curr, moves, i, state)
+                if estimate(s, h, inc):
+                    h_updates += 1
+                else:
+                    h_evals += 1
+                # pathmax, f never drops below the parent's backed up f:
+                s.backUp(curr.getF())
+                if state in backedUp:
+                    s.backUp(backedUp[state])
+                if requeued and s.getF() > bound:
+                    entry[2][state] = s.getF()
+                    continue
+                if queued is not None:
+                    # the queued copy leaves the tree for the cheaper one:
+                    unqueue(state)
+                q.enqueue(s)
+                worst.enqueue(s)
+                entry[1] += 1
+            entry[1] -= 1
+            if len(entry[2]) > 0:
+                # queued again for the successors that were not generated:
+                curr.backUp(min(entry[2].values()))
+                q.enqueue(curr)
+                if entry[1] == 0:
+                    leave(curr)
+                    worst.enqueue(curr)
+            elif entry[1] == 0:
+                leave(curr)
+                if curr.pred is not None:
+                    release(curr.pred)
+            # the queued nodes that are not expanded are the leaves:
+            while len(worst) + len(interior) > budget and len(worst) > 1:
+                forget()
+                forgotten += 1
+            if len(worst) + len(interior) > memory:
+                memory = len(worst) + len(interior)
         # Search failed:
-        return [],-1,-1,-1,-1,-1
+        return [],-1,-1,-1,-1,-1,{"heuristic_evaluations": h_evals,
+                                  "heuristic_updates": h_updates,
+                                  "forgotten": forgotten}
+
+    def arastar(problem, h, weight=3, step=0.5, timeLimit=None,
+                    symmetry=False, report=None):
+        """
+            Anytime repairing A*. Runs weighted A* to find a first plan
+            quickly, then lowers the weight by step and repairs the search,
+            reusing the nodes already generated, each time the plan improves
+            until the weight reaches 1 or the time limit runs out.
+            :param: problem which contains initialState
+            :param: heuristic function to use.
+            :param weight: the first weight of h.
+            :param step: how much the weight drops after each plan.
+            :param timeLimit: seconds to search for, None for no limit.
+            :param symmetry: see astar.
+            :param report: called with (trace, cost, bound, milliseconds)
+                           every time a better plan is found, where bound is
+                           an estimate from h of how much the plan may cost
+                           over the best one, as a factor. It is not proven:
+                           a plan's cost depends on every vehicle's distance
+                           (the total and the longest), so the g + h left in
+                           the queue do not bound what plans through those
+                           nodes cost, and a plan cheaper than one reported
+                           with a bound of 1 may exist.
+            :return:
+                list containing following items:
+                - Trace, expanded_nodes, depth, clock time, memory and cost
+                  of the best plan found and a dictionary of counters
+                  (heuristic_evaluations, heuristic_updates, weight, bound,
+                  solutions), where solutions lists (milliseconds, cost,
+                  estimated bound) for each plan found.
+        """
+        exp_nodes = 0 # number of nodes expanded
+        timer = Timer() # Times the search from here.
+        memory = 0 # the max memory in use i.e. size of data structure
+        h_evals = 0 # number of times the heuristic was computed
+        h_updates = 0 # number of times it was updated from the parent's
+        solutions = []
+
+        inc = problem.incrementalHeuristic(h)
+        h = problem.heuristic(h)
+        canonical = problem.canonical if symmetry else None
+        best = {} # cheapest node generated for each state
+        closed = {} # states expanded since the weight last changed
+        incons = {} # cheaper nodes found for states in closed
+        incumbent = None # cheapest goal node
+        bound = None
+        q = StateHeap(lambda a,b: a.getF() == b.getF(),
+                      lambda a,b: a.getF() < b.getF())
+
+        root = problem.getInitState()
+        estimate(root, h, inc, weight)
+        h_evals += 1
+        rootKey = root.getState() if canonical is None else\
+                    canonical(root.getState())
+        best[rootKey] = root
+        q.enqueue(root, rootKey)
+        if problem.isGoal(root.getState()):
+            incumbent = root
+
+        timedOut = False
+        while True:
+            # improve the path until no queued node can lead to a cheaper
+            # plan under the current weight:
+            while q.isEmpty() is False and (incumbent is None or
+                    incumbent.getCost() > q.heapList[0].item.getF()):
+                if timeLimit is not None and\
+                        seconds(timer.wallNs()) > timeLimit:
+                    timedOut = True
+                    break
+                curr = q.dequeue()
+                exp_nodes += 1
+                currKey = curr.getState() if canonical is None else\
+                            canonical(curr.getState())
+                closed[currKey] = True
+                moves = problem.moves(curr)
+                vehicles, packages, targets, costs = moves
+                for i in range(len(vehicles)):
+                    if incumbent is not None and\
+                            costs[i] >= incumbent.getCost():
+                        continue
+                    state = problem.childState(curr, vehicles[i],
+                                                packages[i], targets[i])
+                    key = state if canonical is None else canonical(state)
+                    if key in best and best[key].getCost() <= costs[i]:
+                        continue
+                    s = problem.materialize(curr, moves, i, state)
+                    best[key] = s
+                    if problem.isGoal(state):
+                        incumbent = s
+                        continue
+                    if estimate(s, h, inc, weight):
+                        h_updates += 1
+                    else:
+                        h_evals += 1
+                    if key in closed:
+                        incons[key] = s
+                    else:
+                        q.enqueue(s, key)
+                if len(q) + len(incons) > memory:
+                    memory = len(q) + len(incons)
+
+            if incumbent is None:
+                break
+            # estimate the best plan's cost from the g + h left:
+            lowest = [e.item.getCost() + e.item.getHeuristic()
+                        for e in q.heapList]
+            lowest += [s.getCost() + s.getHeuristic() for s in incons.values()]
+            bound = weight
+            if len(lowest) == 0:
+                # nothing is left to search at any weight:
+                bound = 1
+            elif min(lowest) > 0:
+                bound = min(weight, incumbent.getCost() / min(lowest))
+            bound = max(bound, 1)
+            if len(solutions) == 0 or\
+                    incumbent.getCost() < solutions[-1][1]:
+                elapsed = timer.wallMs()
+                solutions.append((elapsed, incumbent.getCost(), bound))
+                if report is not None:
+                    report(incumbent.traceBack()[0], incumbent.getCost(),
+                            bound, elapsed)
+            if timedOut or bound <= 1 or weight <= 1:
+                break
+
+            # lower the weight and requeue the open and inconsistent nodes:
+            weight = max(1, weight - step)
+            queued = [e for e in q.heapList]
+            q = StateHeap(lambda a,b: a.getF() == b.getF(),
+                          lambda a,b: a.getF() < b.getF())
+            for e in queued:
+                e.item.setHeuristic(e.item.getHeuristic(), e.item.hAux,
+                                    weight)
+                q.enqueue(e.item, e.key)
+            for key, s in incons.items():
+                s.setHeuristic(s.getHeuristic(), s.hAux, weight)
+                q.enqueue(s, key)
+            incons = {}
+            closed = {}
+
+        counters = {"heuristic_evaluations": h_evals,
+                    "heuristic_updates": h_updates,
+                    "weight": weight,
+                    "bound": bound,
+                    "solutions": solutions}
+        if incumbent is None:
+            return [],-1,-1,-1,-1,-1,counters
+        trace, depth = incumbent.traceBack()
+        return trace, exp_nodes, depth, timer.wallMs(), memory, incumbent.getCost(), counters
+
+def depthToGoal(backward, packed):
+    """
+        Number of moves from a packed state to the goal along the links of
+        a backward search.
+    """
+    depth = 0
+    while backward[packed] is not None:
+        packed = backward[packed]
+        depth += 1
+    return depth
+
+def estimate(node, h, inc, weight=1):
+    """
+        Store the heuristic value of a newly generated node, updating it
+        from the parent's value when an incremental heuristic is given.
+        :param node: the search node.
+        :param h: heuristic function.
+        :param inc: IncrementalHeuristic version of h, or None.
+        :param weight: factor of h in the node's priority.
+        :return: True if the value was updated from the parent's, False if
+                 it was computed from scratch.
+    """
+    if inc is None:
+        node.setHeuristic(h(node.getState()), None, weight)
+        return False
+    if node.pred is None:
+        value, aux = inc.evaluateNode(node)
+        node.setHeuristic(value, aux, weight)
+        return False
+    value, aux = inc.updateNode(node)
+    node.setHeuristic(value, aux, weight)
+    return True
+
+def boundedDepthFirst(problem, depthLimit=None, costBound=None, h=None,
+                        inc=None):
+    """
+        One depth first pass for IDDFS and IDA*. Only the current path and
+        the successors of the nodes on it are kept, and states already on
+        the path are not generated again.
+        :param problem: problem which contains initialState
+        :param depthLimit: nodes at this depth are not expanded.
+        :param costBound: nodes with f = g + h above this are not expanded.
+        :param h: heuristic function, required with costBound.
+        :param inc: IncrementalHeuristic version of h, or None.
+        :return: goal node or None, expanded nodes, max nodes held,
+                 heuristic evaluations, heuristic updates, whether a node
+                 was cut off by the depth limit and the smallest f above
+                 costBound (or None).
+    """
+    exp_nodes = 0
+    h_evals = 0
+    h_updates = 0
+    cutoff = False
+    nextBound = None
+
+    root = problem.getInitState()
+    if h is not None:
+        estimate(root, h, inc)
+        h_evals += 1
+    held = 1 # nodes on the path or waiting to be visited from it
+    memory = 1
+    onPath = {}
+    frames = [[root, None]] # node and iterator over its unvisited successors
+    while len(frames) > 0:
+        frame = frames[-1]
+        node = frame[0]
+        if frame[1] is None:
+            if costBound is not None and node.getF() > costBound:
+                if nextBound is None or node.getF() < nextBound:
+                    nextBound = node.getF()
+                frames.pop()
+                held -= 1
+                continue
+            exp_nodes += 1
+            if problem.isGoal(node.getState()):
+                return node, exp_nodes, memory, h_evals, h_updates, cutoff,\
+                        nextBound
+            if depthLimit is not None and node.depth >= depthLimit:
+                cutoff = True
+                frames.pop()
+                held -= 1
+                continue
+            onPath[node.getState()] = True
+            succ = []
+            for s in problem.successors(node):
+                if s.getState() in onPath:
+                    continue
+                if h is not None:
+                    if estimate(s, h, inc):
+                        h_updates += 1
+                    else:
+                        h_evals += 1
+                succ.append(s)
+            held += len(succ)
+            if memory < held:
+                memory = held
+            # visit the last successor first, like the stack in dfs
+            frame[1] = reversed(succ)
+        else:
+            nextNode = next(frame[1], None)
+            if nextNode is None:
+                del onPath[node.getState()]
+                frames.pop()
+                held -= 1
+            else:
+                frames.append([nextNode, None])
+    return None, exp_nodes, memory, h_evals, h_updates, cutoff, nextBound
 
 def readPlan(trace):
-    result = "##########\nPlan:\n"
-    for i in trace:
-        result += i[1]
-    return result + "##########"
+    steps = [planStep(code) for state, code in trace]
+    return "##########\nPlan:\n" + "".join(steps) + "##########"
 
-if __name__ == '__main__':
+HEURISTICS = [h1, h2, h3, h4, h5, h6, h7]
+
+# Searches that take one of the HEURISTICS:
+HEURISTIC_SEARCHES = ["astar", "idastar", "arastar", "beam", "smastar"]
+
+def reportLabel(algorithm, i=None):
+    """
+        Name a search the way the report lines do, e.g. "DFS" or "IDA* H2".
+        :param algorithm: "bfs", "dfs", "iddfs" or one of the
+                          HEURISTIC_SEARCHES.
+        :param i: 1-based index into HEURISTICS for HEURISTIC_SEARCHES.
+    """
+    if algorithm == "astar":
+        return "H" + str(i)
+    if algorithm == "idastar":
+        return "IDA* H" + str(i)
+    if algorithm == "arastar":
+        return "ARA* H" + str(i)
+    if algorithm == "beam":
+        return "Beam H" + str(i)
+    if algorithm == "smastar":
+        return "SMA* H" + str(i)
+    return algorithm.upper()
+
+def caseJobs(runBFS=False, runIDDFS=False, runIDAStar=False,
+                runARAStar=False, runBidirectional=False, runBeam=False,
+                runSMAStar=False):
+    """
+        List the (algorithm, heuristic index) pairs search.py runs on a
+        problem with the given options, in the order it runs them.
+    """
+    jobs = []
+    if runBFS:
+        jobs.append(("bfs", None))
+    if runBidirectional:
+        jobs.append(("bidirectional", None))
+    jobs.append(("dfs", None))
+    if runIDDFS:
+        jobs.append(("iddfs", None))
+    for i in range(1, len(HEURISTICS) + 1):
+        jobs.append(("astar", i))
+    if runIDAStar:
+        for i in range(1, len(HEURISTICS) + 1):
+            jobs.append(("idastar", i))
+    if runARAStar:
+        for i in range(1, len(HEURISTICS) + 1):
+            jobs.append(("arastar", i))
+    if runBeam:
+        for i in range(1, len(HEURISTICS) + 1):
+            jobs.append(("beam", i))
+    if runSMAStar:
+        for i in range(1, len(HEURISTICS) + 1):
+            jobs.append(("smastar", i))
+    return jobs
+
+def runSearch(problem, algorithm, i=None, **options):
+    """
+        Run one search on a problem.
+        :param problem: problem to solve.
+        :param algorithm: "bfs", "dfs", "iddfs" or one of the
+                          HEURISTIC_SEARCHES.
+        :param i: 1-based index into HEURISTICS for HEURISTIC_SEARCHES.
+        :param options: keyword arguments of the Search method.
+        :return: the result of the Search method.
+    """
+    if algorithm in HEURISTIC_SEARCHES:
+        return getattr(Search, algorithm)(problem, HEURISTICS[i - 1],
+                                            **options)
+    return getattr(Search, algorithm)(problem, **options)
 
-    p = Problem.readProblem()
+def runAlgorithm(problem, algorithm, i=None, printPlan=False, **options):
+    """
+        Run one search on a problem and report its load, cost and the wall
+        and CPU time it took.
+        :param problem: problem to solve.
+        :param algorithm: "bfs", "dfs", "iddfs" or one of the
+                          HEURISTIC_SEARCHES.
+        :param i: 1-based index into HEURISTICS for HEURISTIC_SEARCHES.
+        :param printPlan: whether to add the plan to the report.
+        :param options: keyword arguments of the Search method.
+        :return: list of the report lines.
+    """
+    label = reportLabel(algorithm, i)
+    timer = Timer()
+    result = runSearch(problem, algorithm, i, **options)
+    wall, cpu = timer.wallMs(), timer.cpuMs()
+    if len(result) == 0:
+        return ["----------", label + ": no solution"]
+    load = sum(result[1:5])
+    if algorithm in HEURISTIC_SEARCHES:
+        lines = ["----------", label + ": Load: " + str(load) + "; Cost: " +\
+                    str(result[5])]
+    else:
+        lines = ["----------", label + ": " + str(load) + "; Cost: " +\
+                    str(result[5])]
+    if algorithm == "beam":
+        lines[1] += "; Pruned: " + str(result[6]["pruned"])
+    if algorithm == "smastar":
+        lines[1] += "; Forgotten: " + str(result[6]["forgotten"])
+    lines[1] += "; Wall: " + str(wall) + " ms; CPU: " + str(cpu) + " ms"
+    if printPlan:
+        lines.append(readPlan(result[0]))
+    return lines
 
-    heuristics = [h1,h2,h3,h4,h5]
+if __name__ == '__main__':
 
     runBFS = False
     printPlan = False
+    packed = False
+    runIDDFS = False
+    runIDAStar = False
+    runBidirectional = False
+    symmetry = False
+    weight = None
+    anytime = None
+    width = None
+    budget = None
+    profile = False
     for i in sys.argv:
         if i == "--run-bfs":
             runBFS = True
         if i == "--print-plan":
             printPlan = True
+        if i == "--packed":
+            packed = True
+        if i == "--run-iddfs":
+            runIDDFS = True
+        if i == "--run-idastar":
+            runIDAStar = True
+        if i == "--run-bidirectional":
+            runBidirectional = True
+        if i == "--symmetry":
+            symmetry = True
+        if i == "--profile":
+            profile = True
+    if "--weight" in sys.argv:
+        weight = float(sys.argv[sys.argv.index("--weight") + 1])
+    if "--anytime" in sys.argv:
+        anytime = float(sys.argv[sys.argv.index("--anytime") + 1])
+    if "--beam" in sys.argv:
+        width = int(sys.argv[sys.argv.index("--beam") + 1])
+    if "--sma" in sys.argv:
+        budget = int(sys.argv[sys.argv.index("--sma") + 1])
 
-    if runBFS:
-        bfs_trace, bfs_nodes, bfs_depth, bfs_time, bfs_memory, bfs_cost = Search.bfs(p)
-        print("----------")
-        print("BFS: " + str(bfs_nodes+bfs_depth+bfs_time+bfs_memory) + "; Cost: " + str(bfs_cost))
-        if printPlan:
-            print(readPlan(bfs_trace))
-
-    dfs_trace, dfs_nodes, dfs_depth, dfs_time, dfs_memory, dfs_cost = Search.dfs(p)
-    print("----------")
-    print("DFS: " + str(dfs_nodes+dfs_depth+dfs_time+dfs_memory) + "; Cost: " + str(dfs_cost))
-    if printPlan:
-        print(readPlan(dfs_trace))
-
-    i = 1
-    for h in heuristics:
-        result = list(Search.astar(p, h))
-        trace = result[0]
-        load_count = sum(result[1:5])
-        cost = result[5]
-        print("----------")
-        print("H" + str(i) + ": Load: " + str(load_count) + "; Cost: " +\
-                str(cost))
-        if printPlan:
-            print(readPlan(trace))
-        i += 1
+    def improved(label):
+        """ Print each plan ARA* finds as soon as it is found """
+        def report(trace, cost, bound, elapsed):
+            print("----------")
+            print(label + ": Cost: " + str(cost) + "; Estimated bound: " +\
+                    str(round(bound, 3)) + "; Time: " + str(elapsed))
+            if printPlan:
+                print(readPlan(trace))
+        return report
+
+    p = PackedProblem.readProblem() if packed else Problem.readProblem()
+
+    for algorithm, i in caseJobs(runBFS, runIDDFS, runIDAStar,
+                                    anytime is not None, runBidirectional,
+                                    width is not None, budget is not None):
+        options = {}
+        if algorithm in ["astar", "arastar"] and symmetry:
+            options["symmetry"] = True
+        if algorithm == "astar" and weight is not None:
+            options["weight"] = weight
+        if algorithm == "arastar":
+            options["timeLimit"] = anytime
+            options["report"] = improved(reportLabel(algorithm, i))
+            if weight is not None:
+                options["weight"] = weight
+        if algorithm == "beam":
+            options["width"] = width
+        if algorithm == "smastar":
+            options["budget"] = budget
+        if profile and algorithm in ["bfs", "dfs", "astar"]:
+            options["profile"] = Profile()
+        print("\n".join(runAlgorithm(p, algorithm, i, printPlan, **options)))
+        if "profile" in options:
+            print("\n".join(options["profile"].report()))
@@ -1,6 +1,10 @@
-from costUtils import *
+from costUtils import * # DISTANCE_TO_TIME, stateDiff
 
-DISTANCE_TO_TIME = 10
+# Kinds of move, kept in the two low bits of a move code:
+BEGIN = 0
+PICKUP = 1
+DELIVER = 2
+RETURN = 3
 
 """
     Search node class that defines and implements the search nodes used for
@@ -14,40 +18,92 @@ DISTANCE_TO_TIME = 10
     * - all authors equally contributed to the implementation
 """
 
+def moveCode(kind, vehicle=0, package=-1):
+    """
+        Pack a move into a single integer.
+        :param kind: BEGIN, PICKUP, DELIVER or RETURN.
+        :param vehicle: the moving vehicle.
+        :param package: the package picked up or delivered, -1 for none.
+        :return: move code.
+    """
+    return (vehicle << 18) | ((package + 1) << 2) | kind
+
+def decodeMove(code):
+    """
+        Unpack a move code.
+        :return: (kind, vehicle, package) where package is None for a
+                 return to origin or the root.
+    """
+    package = ((code >> 2) & 0xFFFF) - 1
+    return code & 3, code >> 18, None if package < 0 else package
+
+def planStep(code):
+    """
+        Describe a move for the printed plan.
+        :param code: move code.
+        :return: line of the plan, e.g. "V0 picks up P1\n".
+    """
+    kind, v, j = decodeMove(code)
+    if kind == BEGIN:
+        return "Begin\n"
+    if kind == RETURN:
+        return "V" + str(v) + " returns to origin\n"
+    if kind == DELIVER:
+        return "V" + str(v) + " delivers " + "P" + str(j) + "\n"
+    return "V" + str(v) + " picks up " + "P" + str(j) + "\n"
+
 class SearchNode():
     """
         Class keeps track of the position of the node in a graph.
     """
-    state = None
-    pred = None
-    cost = 0
-    vehicleDistances = None # list corresponding to the distances of all the vehicles.
-    planStep = None
+    __slots__ = ("state", # the state held by the node.
+                 "pred", # the predecessor searchNode.
+                 "cost", # cost of reaching the node.
+                 "hCost", # heuristic estimate of the cost left.
+                 "fCost", # cost + hCost, the priority of the node in A*.
+                 "vehicleDistances", # tuple of the distance of each vehicle.
+                 "code", # move code of the move from pred, see moveCode.
+                 "depth", # number of moves from the root.
+                 "hAux") # data kept by incremental heuristics.
 
-    def __init__(self, _state, _pred, _planStep):
+    def __init__(self, _state, _pred, _code=BEGIN, _vehicleDistances=None):
         """
             Initializes the search nodes class.
             :param _state: the state to construct.
             :param _pred: the predecessor searchNode.
+            :param _code: move code of the move from _pred.
+            :param _vehicleDistances: distances travelled by each vehicle so
+                                        far, worked out from the states when
+                                        not given.
         """
         self.state = _state
         self.pred = _pred
-        self.vehicleDistances = [0] * len(_state.getVehicles())
-        # adjust the cost only for non-root search nodes
-        if self.pred is not None:
+        self.code = _code
+        self.depth = 0
+        self.hCost = 0
+        self.fCost = 0
+        self.hAux = None
+        if _pred is not None:
+            self.depth = _pred.depth + 1
+        if _vehicleDistances is not None:
+            self.vehicleDistances = tuple(_vehicleDistances)
+        elif _pred is None:
+            self.vehicleDistances = (0,) * len(_state.getVehicles())
+        else:
             distancesBetweenVehicles = stateDiff(self.state,
                                                     self.pred.getState())
-            for i in range(len(distancesBetweenVehicles)):
-                self.vehicleDistances[i] = _pred.vehicleDistances[i] +\
+            self.vehicleDistances = tuple(_pred.vehicleDistances[i] +\
                                             distancesBetweenVehicles[i]
+                for i in range(len(distancesBetweenVehicles)))
+        # adjust the cost only for non-root search nodes
+        if self.pred is not None:
             time = DISTANCE_TO_TIME * max(self.vehicleDistances)
             self.cost = sum(self.vehicleDistances) + time
         else:
             self.cost = 0
-        self.planStep = _planStep
 
     def __eq__(self, other):
-        return hash(self.state) == hash(other.state)
+        return self.state == other.state
 
     def __str__(self):
         """
@@ -69,19 +125,66 @@ class SearchNode():
         """
         return self.cost
 
+    def setHeuristic(self, h, aux=None, weight=1):
+        """
+            Store the heuristic value of this node's state so that it is
+            computed once instead of on every comparison.
+            :param h: heuristic value of the state.
+            :param aux: data an incremental heuristic needs for updates.
+            :param weight: factor of h in the priority, as in weighted A*.
+        """
+        self.hCost = h
+        self.fCost = self.cost + weight * h
+        self.hAux = aux
+
+    def backUp(self, f):
+        """
+            Raise f to a lower bound learned from successors that were
+            generated and then forgotten, as in SMA*. The heuristic value
+            itself is kept for the successors' incremental updates.
+            :param f: the smallest f of the forgotten successors.
+        """
+        if f > self.fCost:
+            self.fCost = f
+
+    def getHeuristic(self):
+        """
+            Return the stored heuristic value.
+            :return: h
+        """
+        return self.hCost
+
+    def getF(self):
+        """
+            Return the cost plus the (weighted) stored heuristic value.
+            :return: f
+        """
+        return self.fCost
+
+    @property
+    def move(self):
+        """
+            (vehicle, package) changed by the move from pred, package is
+            None for a return to origin; None for the root.
+        """
+        kind, v, j = decodeMove(self.code)
+        if kind == BEGIN:
+            return None
+        return v, j
+
     def getPlanStep(self):
-        return self.planStep
+        return planStep(self.code)
 
     def traceBack(self):
         """
             Trace back to initial state:
-            :retrn: list containing result and depth
+            :retrn: list containing result and depth, the result holds
+                    (state, move code) pairs from the root, see planStep.
         """
-        depth = 0
-        cursor = self.pred
-        result  = [(self.state, self.getPlanStep())]
+        result = []
+        cursor = self
         while cursor is not None:
-            depth += 1
-            result.insert(0, (cursor.getState(), cursor.getPlanStep()))
+            result.append((cursor.getState(), cursor.code))
             cursor = cursor.pred
-        return result, depth
+        result.reverse()
+        return result, len(result) - 1
@@ -1,5 +1,6 @@
 from problemState import Vehicle, Package, State
 from dataStructures import HashableDictionary
+from unique import InternPool, UNIQUE_INSTANCES
 
 """
     TestUnique file that tests whether classes instantiated with the same
@@ -106,3 +107,25 @@ assert(len(states) == 1)
 assert(states[st] == False)
 assert(len(states_hash) == 1)
 assert(states_hash[st] == False)
+
+# Instances made inside a pool stay in that pool:
+before = len(UNIQUE_INSTANCES)
+pool = InternPool()
+with pool:
+    v5 = Vehicle((7,), 5, 2)
+    v5_copy = Vehicle((7,), 5, 2)
+assert(v5 is v5_copy)
+assert(len(pool) == 1)
+assert(pool.hitRate() == 0.5)
+assert(len(UNIQUE_INSTANCES) == before)
+assert(Vehicle((7,), 5, 2) is not v5)
+
+pool.reset()
+assert(len(pool) == 0)
+
+weak_pool = InternPool(weak=True)
+with weak_pool:
+    v6 = Vehicle((8,), 6, 2)
+assert(len(weak_pool) == 1)
+del v6
+assert(len(weak_pool) == 0)
@@ -1,4 +1,4 @@
-import copy
+import weakref
 
 """
     UniqueHashable class implementation. UniqueHashable implemented due to
@@ -14,17 +14,76 @@ import copy
     * - all authors equally contributed to the implementation 
 """
 
-UNIQUE_INSTANCES = {}
+class InternPool():
+    """
+        Table of unique instances. Instances are created in the innermost
+        active pool, so a problem can keep its own pool that is freed along
+        with it instead of growing one global table forever. The pool keeps
+        hit and miss counts to tell whether interning pays for itself.
+    """
+    table = None
+    hits = 0
+    misses = 0
+
+    def __init__(self, weak=False):
+        """
+            Constructor that initializes an empty pool.
+            :param weak: hold the instances through weak references, so
+                         that they are evicted once nothing else uses them.
+        """
+        self.table = weakref.WeakValueDictionary() if weak else {}
+
+    def intern(self, cls, args):
+        """
+            Return the unique instance of cls for the given arguments,
+            creating it if it is not in the pool yet.
+        """
+        inst = self.table.get((args,cls))
+        if inst is not None:
+            self.hits += 1
+            return inst
+        self.misses += 1
+        inst = object.__new__(cls)
+        self.table[(args,cls)] = inst
+        return inst
+
+    def reset(self):
+        """
+            Drop every instance and the statistics of the pool.
+        """
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def hitRate(self):
+        """
+            Return the fraction of lookups that found an existing instance.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0
+
+    def __enter__(self):
+        ACTIVE_POOLS.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        ACTIVE_POOLS.pop()
+        return False
+
+DEFAULT_POOL = InternPool()
+UNIQUE_INSTANCES = DEFAULT_POOL.table
+ACTIVE_POOLS = [DEFAULT_POOL]
 
 class UniqueHashable:
+    # subclasses may use __slots__, weak pools still need to refer to them:
+    __slots__ = ("__weakref__",)
+
     def __new__(cls, *args, **kwargs):
-        if (args,cls) in UNIQUE_INSTANCES:
-            return UNIQUE_INSTANCES[(args,cls)]
-        else:
-            inst = super(UniqueHashable, cls).__new__(cls)
-            inst.__init__(*args, **kwargs)
-            UNIQUE_INSTANCES[(args,cls)] = inst
-            return inst
+        # __init__ is run by Python on the returned instance:
+        return ACTIVE_POOLS[-1].intern(cls, args)
 
 class Ab(UniqueHashable):
     def __init__(self, a, b):
@@ -0,0 +1,621 @@
+import unittest
+import os, sys
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(CURRENT_DIR), "src"))
+
+from problem import Problem, WAITING, DELIVERED
+from packedProblem import PackedProblem
+from search import Search, caseJobs, runAlgorithm
+from portfolio import problemFromText, runPortfolio, runJobs
+from benchmark import runBenchmark, compare, allocations, frontierBytes
+from batch import streamProblems, runBatch
+from costUtils import *
+from searchNode import *
+from problemState import State
+from profiling import Profile
+from timing import Timer
+from dataStructures import LRUCache, StateHeap, PersistentDictionary
+
+TEST_CASES = os.path.join(CURRENT_DIR, "test_cases")
+
+def readCase(name, cls=Problem):
+    """
+        Read one of the test cases with the given problem class.
+        :param name: name of the test case, e.g. "1312".
+        :param cls: Problem or one of its subclasses.
+    """
+    stdin = sys.stdin
+    with open(os.path.join(TEST_CASES, name + ".txt")) as f:
+        sys.stdin = f
+        try:
+            return cls.readProblem()
+        finally:
+            sys.stdin = stdin
+
+class PackedProblemTestCase(unittest.TestCase):
+
+    def test_successors(self):
+        p = readCase("2212")
+        packed = readCase("2212", PackedProblem)
+        succ = p.successors(p.getInitState())
+        packedSucc = packed.successors(packed.getInitState())
+        self.assertEqual(len(succ), len(packedSucc))
+        for a, b in zip(succ, packedSucc):
+            self.assertEqual(a.getPlanStep(), b.getPlanStep())
+            self.assertEqual(a.getCost(), b.getCost())
+            self.assertEqual(hash(a.getState()),
+                                hash(packed.decode(b.getState())))
+
+    def test_astar(self):
+        for case in ["1312", "2212", "2322"]:
+            p = readCase(case)
+            packed = readCase(case, PackedProblem)
+            for h in [h1, h2, h3, h4, h5]:
+                result = Search.astar(p, h)
+                packedResult = Search.astar(packed, h)
+                self.assertEqual(result[1:3], packedResult[1:3])
+                self.assertAlmostEqual(result[5], packedResult[5])
+                self.assertEqual(result[6]["heuristic_evaluations"],
+                                    packedResult[6]["heuristic_evaluations"])
+
+class StateIdentityTestCase(unittest.TestCase):
+
+    def test_equality(self):
+        p = readCase("2212")
+        packed = readCase("2212", PackedProblem)
+        succ = p.successors(p.getInitState())
+        packedSucc = packed.successors(packed.getInitState())
+        for a, b in zip(succ, packedSucc):
+            # built in different intern pools, still equal:
+            self.assertEqual(a.getState(), packed.decode(b.getState()))
+        self.assertNotEqual(succ[0].getState(), succ[1].getState())
+
+    def test_zobrist(self):
+        p = readCase("2322")
+        node = p.getInitState()
+        while len(p.successors(node)) > 0:
+            for succ in p.successors(node):
+                self.assertEqual(hash(succ.getState()),
+                                    p.stateHash(succ.getState()))
+            node = p.successors(node)[-1]
+        packed = readCase("2322", PackedProblem)
+        self.assertEqual(hash(packed.decode(packed.packedGoal())),
+                            hash(node.getState()))
+
+    def test_built_by_hand(self):
+        p = readCase("2322")
+        for node in p.successors(p.getInitState()):
+            s = node.getState()
+            t = State(s.getVehicles().clone(), s.getPackages().clone())
+            self.assertEqual(s, t)
+            self.assertEqual(hash(s), hash(t))
+            self.assertIn(t, {s: True})
+
+    def test_collision(self):
+        p = readCase("2212")
+        nodes = p.successors(p.getInitState())[:2]
+        a, b = [node.getState() for node in nodes]
+        b.hashValue = hash(a) # force a collision
+        self.assertNotEqual(a, b)
+        self.assertEqual(len({a: True, b: True}), 2)
+        q = StateHeap(lambda x,y: x.getF() == y.getF(),
+                      lambda x,y: x.getF() < y.getF())
+        for node in nodes:
+            q.enqueue(node)
+        self.assertEqual(len(q), 2)
+
+class PersistentDictionaryTestCase(unittest.TestCase):
+
+    def test_clone(self):
+        d = PersistentDictionary("PACKAGES")
+        for j in range(20):
+            d[j] = str(j)
+        copy = d.clone()
+        copy[3] = "x"
+        copy.pop(17)
+        copy[70] = "y" # adds a level to the trie
+        self.assertEqual(list(d.items()), [(j, str(j)) for j in range(20)])
+        self.assertEqual([k for k, v in copy.items()],
+                            [j for j in range(20) if j != 17] + [70])
+        self.assertEqual((copy[3], copy[70], len(copy)), ("x", "y", 20))
+        self.assertNotIn(17, copy)
+        self.assertIn(17, d)
+        self.assertNotEqual(copy, d)
+        copy[3] = "3"
+        copy.pop(70)
+        copy[17] = "17"
+        # same entries in a trie of another shape:
+        self.assertEqual(copy, d)
+        self.assertEqual(hash(copy), hash(d))
+
+class SearchNodeTestCase(unittest.TestCase):
+
+    def test_move_codes(self):
+        for kind, v, j in [(PICKUP, 0, 0), (DELIVER, 3, 12), (RETURN, 2, -1)]:
+            kind2, v2, j2 = decodeMove(moveCode(kind, v, j))
+            self.assertEqual((kind2, v2, -1 if j2 is None else j2),
+                                (kind, v, j))
+        self.assertEqual(planStep(moveCode(DELIVER, 1, 2)), "V1 delivers P2\n")
+        self.assertEqual(planStep(BEGIN), "Begin\n")
+
+    def test_trace_back(self):
+        p = readCase("2212")
+        node = p.getInitState()
+        path = [node]
+        while len(p.successors(node)) > 0:
+            node = p.successors(node)[-1]
+            path.append(node)
+        trace, depth = node.traceBack()
+        self.assertEqual(depth, len(path) - 1)
+        self.assertEqual(trace, [(n.getState(), n.code) for n in path])
+
+class MovesTestCase(unittest.TestCase):
+
+    def test_batch_moves(self):
+        for cls in [Problem, PackedProblem]:
+            p = readCase("2322", cls)
+            nodes = p.successors(p.getInitState())
+            parents, vehicles, packages, targets, costs = p.batchMoves(nodes)
+            offset = 0
+            for i in range(len(nodes)):
+                moves = p.moves(nodes[i])
+                count = len(moves[0])
+                self.assertEqual(list(parents[offset:offset + count]),
+                                    [i] * count)
+                self.assertEqual(moves, (vehicles[offset:offset + count],
+                    packages[offset:offset + count],
+                    targets[offset:offset + count],
+                    costs[offset:offset + count]))
+                succ = p.successors(nodes[i])
+                self.assertEqual([s.getCost() for s in succ], list(moves[3]))
+                offset += count
+            self.assertEqual(offset, len(parents))
+
+class SymmetryTestCase(unittest.TestCase):
+
+    def test_canonical(self):
+        for cls in [Problem, PackedProblem]:
+            p = readCase("2322", cls)
+            succ = p.successors(p.getInitState())
+            # V0 and V1 picking up P0 only differ by the vehicle:
+            self.assertEqual(p.canonical(succ[0].getState()),
+                                p.canonical(succ[3].getState()))
+            self.assertNotEqual(p.canonical(succ[0].getState()),
+                                p.canonical(succ[1].getState()))
+
+    def test_astar(self):
+        for case in ["2322", "3322"]:
+            for cls in [Problem, PackedProblem]:
+                p = readCase(case, cls)
+                for h in [h1, h3, h5]:
+                    result = Search.astar(p, h)
+                    reduced = Search.astar(p, h, symmetry=True)
+                    self.assertAlmostEqual(result[5], reduced[5])
+                    self.assertLess(reduced[1], result[1])
+
+class IncrementalHeuristicTestCase(unittest.TestCase):
+
+    def checkPaths(self, p, h):
+        inc = p.incrementalHeuristic(h)
+        full = h
+        if isinstance(p, PackedProblem):
+            full = lambda state: h(p.decode(state))
+        node = p.getInitState()
+        value, aux = inc.evaluate(node.getState())
+        self.assertAlmostEqual(value, full(node.getState()))
+        # follow the first, last and middle successor down to the goal
+        for pick in [0, -1, 1]:
+            curr, currValue, currAux = node, value, aux
+            succ = p.successors(curr)
+            while len(succ) > 0:
+                nxt = succ[pick % len(succ)]
+                currValue, currAux = inc.update(currValue, currAux,
+                    curr.getState(), nxt.getState(), nxt.move)
+                self.assertAlmostEqual(currValue, full(nxt.getState()))
+                curr = nxt
+                succ = p.successors(curr)
+
+    def test_update(self):
+        for case in ["2322", "3322"]:
+            for cls in [Problem, PackedProblem]:
+                p = readCase(case, cls)
+                for h in [h1, h2, h3, h4, h5, h6, h7]:
+                    self.checkPaths(p, h)
+
+class LowerBoundTestCase(unittest.TestCase):
+
+    def checkBounds(self, p, inc, node):
+        """ Check every node below node, return the best reachable cost """
+        if p.isGoal(node.getState()):
+            best = node.getCost()
+        else:
+            best = min(self.checkBounds(p, inc, s) for s in p.successors(node))
+        self.assertLessEqual(inc.evaluateNode(node)[0],
+                                best - node.getCost() + 1e-9)
+        return best
+
+    def test_admissible(self):
+        for case in ["1312", "2212"]:
+            p = readCase(case, PackedProblem)
+            for h in [h6, h7]:
+                self.checkBounds(p, p.incrementalHeuristic(h),
+                                    p.getInitState())
+
+    def test_expansions(self):
+        for case in ["2322", "3322"]:
+            p = readCase(case, PackedProblem)
+            result = Search.astar(p, h1)
+            bounded = Search.astar(p, h7)
+            self.assertAlmostEqual(result[5], bounded[5])
+            self.assertLess(bounded[1], result[1] / 2)
+
+class MemoTestCase(unittest.TestCase):
+
+    def test_lru(self):
+        memo = LRUCache(2)
+        memo.put("a", 1)
+        memo.put("b", 2)
+        self.assertEqual(memo.get("a"), 1)
+        memo.put("c", 3) # forgets b, the least recently used
+        self.assertIsNone(memo.get("b"))
+        self.assertEqual(memo.get("c"), 3)
+        self.assertEqual((memo.hits, memo.misses, len(memo)), (2, 1, 2))
+
+    def test_astar(self):
+        for cls in [Problem, PackedProblem]:
+            p = readCase("2422", cls)
+            for h in [h2, h3]:
+                plain = Search.astar(p, h, memoSize=0)
+                memo = Search.astar(p, h)
+                self.assertEqual(plain[1:3], memo[1:3])
+                self.assertAlmostEqual(plain[5], memo[5])
+                counters = memo[6]
+                self.assertGreater(counters["memo_hits"], 0)
+                # every miss was computed once, every hit was not:
+                self.assertEqual(counters["heuristic_evaluations"] +
+                                    counters["heuristic_updates"],
+                                    counters["memo_misses"] + 1)
+            # h7 depends on the distances driven, it is never remembered:
+            self.assertEqual(Search.astar(p, h7)[6]["memo_misses"], 0)
+
+class AnytimeTestCase(unittest.TestCase):
+
+    def test_weighted(self):
+        p = readCase("3322", PackedProblem)
+        for h in [h2, h7]:
+            optimal = Search.astar(p, h)
+            weighted = Search.astar(p, h, weight=3)
+            self.assertLessEqual(weighted[1], optimal[1])
+            self.assertLessEqual(weighted[5], 3 * optimal[5])
+
+    def test_arastar(self):
+        for case in ["2322", "2522"]:
+            p = readCase(case, PackedProblem)
+            reported = []
+            result = Search.arastar(p, h7, weight=3,
+                        report=lambda *plan: reported.append(plan))
+            costs = [cost for (ms, cost, bound) in result[6]["solutions"]]
+            self.assertEqual(costs, [plan[1] for plan in reported])
+            self.assertEqual(costs, sorted(costs, reverse=True))
+            self.assertAlmostEqual(result[5], Search.astar(p, h7)[5])
+            self.assertEqual(result[6]["bound"], 1)
+            self.assertTrue(p.isGoal(reported[-1][0][-1][0]))
+
+    def test_arastar_exhausted(self):
+        # the first weighted search leaves nothing to search on 2422, so
+        # the weight is not lowered:
+        p = readCase("2422", PackedProblem)
+        result = Search.arastar(p, h1, weight=3)
+        self.assertEqual(len(result[6]["solutions"]), 1)
+        self.assertAlmostEqual(result[5], result[6]["solutions"][0][1])
+        self.assertEqual(result[6]["solutions"][-1][2], 1)
+        self.assertEqual((result[6]["bound"], result[6]["weight"]), (1, 3))
+
+class BoundedMemoryTestCase(unittest.TestCase):
+
+    def test_beam(self):
+        p = readCase("2422", PackedProblem)
+        optimal = Search.astar(p, h7)
+        narrow = Search.beam(p, h7, width=10)
+        self.assertTrue(p.isGoal(narrow[0][-1][0]))
+        self.assertGreater(narrow[6]["pruned"], 0)
+        self.assertGreaterEqual(narrow[5], optimal[5] - 1e-9)
+        wide = Search.beam(p, h7, width=100000)
+        self.assertEqual(wide[6]["pruned"], 0)
+        self.assertAlmostEqual(wide[5], optimal[5])
+
+    def test_smastar(self):
+        for cls in [Problem, PackedProblem]:
+            p = readCase("3322", cls)
+            optimal = Search.astar(p, h1)
+            for budget in [200, 100000]:
+                result = Search.smastar(p, h1, budget=budget)
+                self.assertAlmostEqual(result[5], optimal[5])
+                self.assertLessEqual(result[4], budget)
+            self.assertGreater(Search.smastar(p, h1, 200)[6]["forgotten"], 0)
+
+    def test_smastar_forgotten_branch(self):
+        # the cheapest plan goes through a branch forgotten while a sibling
+        # subtree is still in the tree:
+        text = "2\n3\n2\n2\n1.0 0.0 1.0 0.0\n1.0 2.0 2.0 1.0\n0.0 2.0 0.0 0.0"
+        for cls in [Problem, PackedProblem]:
+            p = cls.parseProblem(iter(text.splitlines()).__next__)
+            optimal = Search.astar(p, h1)
+            result = Search.smastar(p, h1, budget=60)
+            self.assertGreater(result[6]["forgotten"], 0)
+            self.assertAlmostEqual(result[5], optimal[5])
+            self.assertLessEqual(result[4], 60)
+
+    def test_smastar_requeued_parent(self):
+        # re-expanding a queued parent released it from the tree, leaving
+        # its new successors pointing at a forgotten node (KeyError):
+        text = "1\n3\n2\n2\n1.0 2.0 0.0 1.0\n3.0 2.0 1.0 2.0\n2.0 0.0 1.0 3.0"
+        for cls in [Problem, PackedProblem]:
+            p = cls.parseProblem(iter(text.splitlines()).__next__)
+            optimal = Search.astar(p, h1)
+            for h in [h1, h6]:
+                for budget in [10, 30]:
+                    result = Search.smastar(p, h, budget=budget)
+                    self.assertAlmostEqual(result[5], optimal[5])
+                    self.assertLessEqual(result[4], budget)
+
+    def test_smastar_tied_successors(self):
+        # successors forgotten with the same f took turns forever when
+        # generated again without the f they had backed up:
+        text = "3\n2\n1\n2\n0.0 1.0 1.0 0.0\n2.0 2.0 0.0 1.0"
+        p = Problem.parseProblem(iter(text.splitlines()).__next__)
+        optimal = Search.astar(p, h1)
+        for budget in [8, 10, 12]:
+            result = Search.smastar(p, h1, budget=budget)
+            self.assertAlmostEqual(result[5], optimal[5])
+            self.assertLessEqual(result[4], budget)
+
+class BfsTestCase(unittest.TestCase):
+
+    def test_bfs(self):
+        for case in ["1312", "2212", "2412"]:
+            p = readCase(case)
+            packed = readCase(case, PackedProblem)
+            trace, nodes, depth, time, memory, cost = Search.bfs(p)
+            self.assertTrue(p.isGoal(trace[-1][0]))
+            self.assertEqual(len(trace), depth + 1)
+            packedResult = Search.bfs(packed)
+            self.assertEqual((nodes, depth), packedResult[1:3])
+            self.assertAlmostEqual(cost, packedResult[5])
+
+    def test_bfs_duplicates(self):
+        # Tree search took 132k load units on 2412:
+        nodes = Search.bfs(readCase("2412"))[1]
+        self.assertLess(nodes, 1000)
+
+class IterativeDeepeningTestCase(unittest.TestCase):
+
+    def test_depth_limit(self):
+        for cls in [Problem, PackedProblem]:
+            p = readCase("2412", cls)
+            # the shallowest plan is 9 moves deep:
+            self.assertEqual(Search.dfs(p, depthLimit=8), [])
+            trace, nodes, depth, time, memory, cost = \
+                Search.dfs(p, depthLimit=9)
+            self.assertTrue(p.isGoal(trace[-1][0]))
+            self.assertEqual(depth, 9)
+
+    def test_iddfs(self):
+        for case in ["1312", "2212", "2322"]:
+            for cls in [Problem, PackedProblem]:
+                p = readCase(case, cls)
+                trace, nodes, depth, time, memory, cost = Search.iddfs(p)
+                self.assertTrue(p.isGoal(trace[-1][0]))
+                self.assertEqual(depth, Search.bfs(p)[2])
+        self.assertEqual(Search.iddfs(readCase("2412"), maxDepth=8), [])
+
+    def test_idastar(self):
+        for case, heuristics in [("2212", [h6, h7]), ("2322", [h7])]:
+            p = readCase(case, PackedProblem)
+            for h in heuristics:
+                result = Search.idastar(p, h)
+                self.assertTrue(p.isGoal(result[0][-1][0]))
+                self.assertAlmostEqual(result[5], Search.astar(p, h)[5])
+                counters = result[6]
+                self.assertGreater(counters["iterations"], 1)
+                # the root is evaluated once per iteration, every other
+                # node is updated from its parent:
+                self.assertEqual(counters["heuristic_evaluations"],
+                                    counters["iterations"])
+                self.assertGreater(counters["heuristic_updates"], 0)
+
+class BidirectionalTestCase(unittest.TestCase):
+
+    def test_predecessors(self):
+        for cls in [Problem, PackedProblem]:
+            p = readCase("2322", cls)
+            node = p.getInitState()
+            while len(p.successors(node)) > 0:
+                for succ in p.successors(node):
+                    self.assertIn(p.pack(node.getState()),
+                                    p.predecessors(p.pack(succ.getState())))
+                node = p.successors(node)[-1]
+            self.assertEqual(p.pack(node.getState()), p.packedGoal())
+
+    def test_consistent(self):
+        p = readCase("2322", PackedProblem)
+        # every state the initial state reaches is consistent:
+        seen = {}
+        layer = [p.getInitState()]
+        while len(layer) > 0:
+            for node in layer:
+                self.assertTrue(p.consistent(node.getState()))
+                seen[node.getState()] = True
+            layer = [s for node in layer for s in p.successors(node)
+                        if s.getState() not in seen]
+        # V0 at the source of P0 without carrying it:
+        state = (p.source(0), 0, WAITING, WAITING, WAITING)
+        self.assertFalse(p.consistent(state))
+        # both vehicles left at the destination of the one package
+        # delivered:
+        state = (p.destination(0), p.destination(0), DELIVERED, WAITING,
+                    WAITING)
+        self.assertFalse(p.consistent(state))
+        self.assertTrue(p.consistent((p.destination(0), 0, DELIVERED,
+                                        WAITING, WAITING)))
+
+    def test_bidirectional(self):
+        for case in ["1312", "2212", "2412"]:
+            for cls in [Problem, PackedProblem]:
+                p = readCase(case, cls)
+                trace, nodes, depth, time, memory, cost = \
+                    Search.bidirectional(p)
+                self.assertTrue(p.isGoal(trace[-1][0]))
+                self.assertEqual(len(trace), depth + 1)
+                self.assertEqual(depth, Search.bfs(p)[2])
+
+class ProfileTestCase(unittest.TestCase):
+
+    def test_profile(self):
+        for cls in [Problem, PackedProblem]:
+            p = readCase("2422", cls)
+            for search, args in [(Search.bfs, ()), (Search.dfs, ()),
+                                    (Search.astar, (h2,))]:
+                profile = Profile()
+                result = search(p, *args, profile=profile)
+                plain = search(p, *args)
+                self.assertEqual(result[1:3], plain[1:3])
+                self.assertAlmostEqual(result[5], plain[5])
+                self.assertGreater(profile.phases["successors"], 0)
+                self.assertGreater(profile.phases["closed"], 0)
+                self.assertGreaterEqual(profile.generated, profile.expanded)
+                self.assertLessEqual(profile.expanded, result[1])
+                # the problem itself is not instrumented:
+                self.assertNotIn("moves", vars(p))
+            self.assertGreater(profile.phases["heuristic"], 0)
+            self.assertGreater(profile.duplicates, 0)
+
+class TimingTestCase(unittest.TestCase):
+
+    def test_timer(self):
+        timer = Timer()
+        Search.astar(readCase("2422"), h1)
+        wall, cpu = timer.wallNs(), timer.cpuNs()
+        self.assertGreater(wall, 0)
+        self.assertGreater(cpu, 0)
+        self.assertLessEqual(wall, timer.wallNs())
+
+    def test_shared_copy(self):
+        # A2 keeps a copy of the timing module, see timing.py:
+        root = os.path.dirname(os.path.dirname(CURRENT_DIR))
+        with open(os.path.join(root, "A1", "src", "timing.py"), "rb") as a,\
+                open(os.path.join(root, "A2", "src", "timing.py"), "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+class PortfolioTestCase(unittest.TestCase):
+
+    def test_portfolio(self):
+        with open(os.path.join(TEST_CASES, "1312.txt")) as f:
+            text = f.read()
+        jobs = [(text, False, algorithm, i, True)
+                    for algorithm, i in caseJobs(runBFS=True)]
+        results = runPortfolio(jobs, workers=2)
+        p = problemFromText(text)
+        for (algorithm, i), lines in zip(caseJobs(runBFS=True), results):
+            expected = runAlgorithm(p, algorithm, i, True)
+            # loads hold the run time, compare the costs and plans:
+            self.assertEqual(lines[1].split("; ")[1],
+                                expected[1].split("; ")[1])
+            self.assertEqual(lines[2:], expected[2:])
+
+    def test_timeout(self):
+        with open(os.path.join(TEST_CASES, "3422.txt")) as f:
+            text = f.read()
+        results = runPortfolio([(text, False, "bfs", None, False)],
+                                timeout=0.01)
+        self.assertEqual(results[0][1], "BFS: timed out after 0.01s")
+
+    def test_failure(self):
+        results = runJobs(int, [("x",), ("7",)])
+        failure, value = results[0]
+        self.assertEqual(failure,
+            "failed: ValueError(\"invalid literal for int() with base 10: 'x'\")")
+        self.assertIn("Traceback", value)
+        self.assertEqual(results[1], (None, 7))
+
+class BatchTestCase(unittest.TestCase):
+
+    def test_stream(self):
+        names = ["1111", "1312", "2212"]
+        lines = []
+        for name in names:
+            with open(os.path.join(TEST_CASES, name + ".txt")) as f:
+                lines += f.readlines() + ["\n"]
+        problems = list(streamProblems(lines, "cases"))
+        self.assertEqual([name for name, p in problems],
+                            ["cases", "cases#2", "cases#3"])
+        for name, (_, p) in zip(names, problems):
+            self.assertEqual(p.initState, readCase(name).initState)
+
+    def test_truncated(self):
+        lines = []
+        for name in ["1111", "1312"]:
+            with open(os.path.join(TEST_CASES, name + ".txt")) as f:
+                lines += f.readlines() + ["\n"]
+        problems = streamProblems(lines[:-3], "cases")
+        self.assertEqual(next(problems)[0], "cases")
+        with self.assertRaisesRegex(ValueError,
+                                    "problem 2 of cases is truncated"):
+            next(problems)
+
+    def test_jsonl(self):
+        record = '{"name": "tiny", "m": 1, "n": 1, "k": 1, "y": 2, ' +\
+                    '"packages": [[[0.1, 0.2], [0.9, 0.5]]]}\n'
+        problems = streamProblems([record, "\n", record], "cases.jsonl", True)
+        reports = []
+        count = runBatch(problems, caseJobs(runBFS=True),
+                            output=lambda name, lines: reports.append(name))
+        self.assertEqual(count, 2)
+        self.assertEqual(reports, ["tiny"] * (2 * len(caseJobs(runBFS=True))))
+
+class BenchmarkTestCase(unittest.TestCase):
+
+    def test_benchmark(self):
+        case = os.path.join(TEST_CASES, "1312.txt")
+        records = runBenchmark([case], ["bfs", "astar"], timeout=None)
+        self.assertEqual([r["search"] for r in records],
+                            ["BFS", "H1", "H2", "H3", "H4", "H5", "H6", "H7"])
+        for record in records:
+            self.assertEqual(record["status"], "solved")
+            self.assertGreaterEqual(record["generated"], record["expanded"])
+            self.assertGreater(record["peak_rss_kb"], 0)
+        self.assertEqual(compare(records, records), [])
+
+    def test_frontier_bytes(self):
+        with open(os.path.join(TEST_CASES, "1312.txt")) as f:
+            perNode, frontier, peak = frontierBytes(f.read())
+        self.assertGreater(frontier, 0)
+        self.assertEqual(perNode, peak // frontier)
+        # no packages, the initial state is the goal and nothing is queued:
+        self.assertEqual(frontierBytes("1\n0\n1\n2\n")[:2], (None, 0))
+
+    def test_allocations(self):
+        # 24 packages, copying them for every successor took 1.8k bytes:
+        text = "2\n24\n2\n2\n" + "".join("0.%02d 0.5 0.5 0.%02d\n" % (j, j)
+                                        for j in range(1, 25))
+        count, size, blocks = allocations(text, expansions=100)
+        self.assertGreater(count, 100)
+        self.assertLess(size, 1000)
+        # no packages, nothing to move:
+        self.assertEqual(allocations("1\n0\n1\n2\n"), (0, None, None))
+
+    def test_compare(self):
+        before = {"case": "1312", "encoding": "object", "search": "H1",
+                    "status": "solved", "expanded": 32, "generated": 60,
+                    "peak_frontier": 20, "depth": 7, "cost": 58.74,
+                    "wall_ms": 10.0, "peak_rss_kb": 10000}
+        after = dict(before, expanded=40, wall_ms=12.0, peak_rss_kb=20000)
+        self.assertEqual(compare([after], [before]),
+                            ["1312 object H1: expanded 32 -> 40",
+                             "1312 object H1: peak_rss_kb 10000 -> 20000"])
+        timedOut = dict(before, status="timed out after 60s")
+        self.assertEqual(compare([timedOut], [before]),
+                            ["1312 object H1: timed out after 60s"])
+
+if __name__ == '__main__':
+    unittest.main()
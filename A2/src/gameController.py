@@ -3,7 +3,7 @@ from constants import Constants
 from board import Board, Piece
 from evaluate import Evaluate
 from gamePlay import minimax, alphaBeta
-from time import time
+from timing import Timer, seconds
 import sys
 import math
 
@@ -145,6 +145,8 @@ def runGame(depth_limit, search, H, A):
     Instantiates and runs a game.
     :param depth_limit: the depth limit of the search strategy used
     :param search: search strategy - minimax/alphabeta
+    :return: average table size, node count, wall time (s), table hit rate
+             and CPU time (s) per ply.
     """
 
     HUMAN, ALL_AI = H, A
@@ -153,6 +155,7 @@ def runGame(depth_limit, search, H, A):
     avg_table_size_per_ply = 0
     avg_node_count_per_ply = 0
     avg_time_per_ply = 0
+    avg_cpu_time_per_ply = 0
     avg_table_hit_rate_per_ply = 0
     index = 0
 
@@ -170,14 +173,15 @@ def runGame(depth_limit, search, H, A):
                 print("> Enter move again: ", end='')
         else:
             index += 1
-            start_time = time()
+            timer = Timer()
             avg_table_size, node_count, avg_table_hit_rate =\
                 game.advanceWithAI(search)
-            end_time = time()
+            wall_time, cpu_time = timer.wallNs(), timer.cpuNs()
 
             avg_table_size_per_ply += avg_table_size
             avg_node_count_per_ply += node_count
-            avg_time_per_ply += (end_time-start_time)
+            avg_time_per_ply += seconds(wall_time)
+            avg_cpu_time_per_ply += seconds(cpu_time)
             avg_table_hit_rate_per_ply += avg_table_hit_rate
 
         HUMAN = not HUMAN
@@ -189,5 +193,6 @@ def runGame(depth_limit, search, H, A):
     return avg_table_size_per_ply/index, \
            avg_node_count_per_ply/index, \
            avg_time_per_ply/index,\
-            avg_table_hit_rate_per_ply/index
+            avg_table_hit_rate_per_ply/index,\
+            avg_cpu_time_per_ply/index
 
@@ -5,7 +5,6 @@ from gamePlay import minimax, alphaBeta
 from evaluate import Evaluate
 from hashTable import HashTable
 from gameController import Game, runGame
-from time import time
 import matplotlib.pyplot as plt
 import sys
 
@@ -79,31 +78,33 @@ def getStats(depth_limit):
 
     print("######")
     print("Statistics Output Format:")
-    print("ALGORITHM: SPACE TIME EXEC_TIME_S THR")
+    print("ALGORITHM: SPACE TIME EXEC_TIME_S THR CPU_TIME_S")
     print("######", end="\n\n\n")
 
     #run for multiple depths of minimax
     for i in range(1, depth_limit+1):
         print("-----\nDEPTH:", i, "\n")
         #stats for minimax
-        minimax_size, minimax_count, minimax_t, minimax_thr =\
+        minimax_size, minimax_count, minimax_t, minimax_thr, minimax_cpu =\
             runGame(i, minimax, False, True)
         avg_table_size_minimax.append(minimax_size/1000)
         avg_node_count_minimax.append(minimax_count/1000000)
         times_per_minimax_run.append(minimax_t)
 
         print("MINIMAX GAME: ", end='')
-        print(minimax_size, minimax_count, minimax_t, minimax_thr)
+        print(minimax_size, minimax_count, minimax_t, minimax_thr,
+                minimax_cpu)
 
         #stats for alphabeta
-        alphabeta_size, alphabeta_nodes, alphabeta_t, alphabeta_thr = \
-            runGame(i, alphaBeta, False, True)
+        alphabeta_size, alphabeta_nodes, alphabeta_t, alphabeta_thr,\
+            alphabeta_cpu = runGame(i, alphaBeta, False, True)
         avg_table_size_alphabeta.append(alphabeta_size/1000)
         avg_node_count_alphabeta.append(alphabeta_nodes/1000000)
         times_per_alphabeta_run.append(alphabeta_t)
 
         print("ALPHA_BETA GAME: ", end='')
-        print(alphabeta_size, alphabeta_nodes, alphabeta_t, alphabeta_thr)
+        print(alphabeta_size, alphabeta_nodes, alphabeta_t, alphabeta_thr,
+                alphabeta_cpu)
 
         print("\nFinished Minimax and AlphaBeta for depth:", i, "\n-----\n\n")
 
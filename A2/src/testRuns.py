@@ -1,11 +1,10 @@
 from gameController import *
 from gamePlay import alphaBeta, minimax
-from time import time
+from timing import Timer, seconds
 
 for i in range(1,8):
     game = Game(i)
-    start = time()
+    timer = Timer()
     game.advanceWithAI(alphaBeta)
-    end = time()
-    print("Time for depth",i, ":", (end-start))
-
+    print("Time for depth",i, ":", seconds(timer.wallNs()),
+            "CPU:", seconds(timer.cpuNs()))